@@ -3,84 +3,159 @@ anilist/api.py
 
 Handles all AniList GraphQL API queries and mutations:
 - User lookup
-- Fetching lists (public/private, anime/manga)
+- Fetching lists (public/private, anime/manga), whole or streamed chunk by chunk
 - Filtering by status/title
-- SaveMediaListEntry mutations for restore
+- SaveMediaListEntry mutations for restore (single or aliased batches)
 - Viewer info for token/account verification
+- Per-run identity cache (viewer by token, user id by username) with TTL,
+  backed by the persistent cross-run cache in anilist/cache.py
 
-Depends on: anilist/auth.py, anilist/ratelimit.py, anilist/formatter.py
+All HTTP goes through the shared pooled transport (anilist/transport.py);
+every function accepts an optional transport= to inject a different one.
+
+Depends on: anilist/auth.py, anilist/ratelimit.py, anilist/formatter.py, anilist/transport.py
 """
 
-import requests
+import time
+import threading
+from anilist.transport import get_transport, NETWORK_ERRORS
 from anilist.ratelimit import handle_rate_limit
 from anilist.formatter import filter_entries
+from anilist.cache import response_cache
+from anilist.jsoncodec import response_json
 
 ANILIST_API = "https://graphql.anilist.co"
 
-def get_user_id(username):
+# Identity lookups can't change mid-run, so they are answered from memory for a while.
+# Keys: ("viewer", token) -> {"id", "username"}, ("user", username) -> id
+IDENTITY_CACHE_TTL = 15 * 60  # seconds
+_identity_cache = {}
+_identity_lock = threading.Lock()
+
+def _identity_get(kind, key):
+    with _identity_lock:
+        item = _identity_cache.get((kind, key))
+        if item is not None:
+            expires_at, value = item
+            if expires_at >= time.monotonic():
+                return value
+            del _identity_cache[(kind, key)]
+    # Fall back to the on-disk cache from earlier runs
+    value = response_cache.get(kind, key)
+    if value is not None:
+        with _identity_lock:
+            _identity_cache[(kind, key)] = (time.monotonic() + IDENTITY_CACHE_TTL, value)
+    return value
+
+def _identity_put(kind, key, value):
+    with _identity_lock:
+        _identity_cache[(kind, key)] = (time.monotonic() + IDENTITY_CACHE_TTL, value)
+    response_cache.put(kind, key, value)
+
+def invalidate_identity_cache(token=None, username=None):
+    """
+    Drops cached identity lookups. With no arguments, clears everything;
+    otherwise only the entries for the given token and/or username.
+    Call after (re-)authentication or when an account is removed.
+    """
+    with _identity_lock:
+        if token is None and username is None:
+            _identity_cache.clear()
+        if token is not None:
+            _identity_cache.pop(("viewer", token), None)
+        if username is not None:
+            _identity_cache.pop(("user", username), None)
+    if token is None and username is None:
+        response_cache.clear()
+    if token is not None:
+        response_cache.invalidate("viewer", token)
+    if username is not None:
+        response_cache.invalidate("user", username)
+
+def get_user_id(username, transport=None):
+    cached = _identity_get("user", username)
+    if cached:
+        return cached
     query = '''
     query ($name: String) {
         User(search: $name) { id }
     }
     '''
     variables = {'name': username}
-    resp = requests.post(ANILIST_API, json={'query': query, 'variables': variables})
+    transport = transport or get_transport()
+    resp = transport.post(ANILIST_API, json={'query': query, 'variables': variables})
     if resp.status_code == 200:
-        data = resp.json()
+        data = response_json(resp)
         uid = data.get('data', {}).get('User', {}).get('id')
         if uid:
+            _identity_put("user", username, uid)
             return uid
     raise Exception(f"Unable to find AniList user '{username}'.")
 
-def get_viewer_info(token):
+def get_viewer_info(token, transport=None):
     """
     Returns dict { "id": ..., "username": ... } for authenticated user.
+    Answered from the identity cache when the token was looked up recently.
     """
+    cached = _identity_get("viewer", token)
+    if cached:
+        return dict(cached)
     query = '''
     query { Viewer { id name } }
     '''
     headers = { "Authorization": f"Bearer {token}" }
-    resp = requests.post(ANILIST_API, json={"query": query}, headers=headers)
+    transport = transport or get_transport()
+    resp = transport.post(ANILIST_API, json={"query": query}, headers=headers)
     if resp.status_code == 200:
-        viewer = resp.json()["data"]["Viewer"]
-        return {"id": viewer["id"], "username": viewer["name"]}
+        viewer = response_json(resp)["data"]["Viewer"]
+        info = {"id": viewer["id"], "username": viewer["name"]}
+        _identity_put("viewer", token, info)
+        _identity_put("user", info["username"], info["id"])
+        return dict(info)
     return None
 
-def get_viewer_username(token):
-    info = get_viewer_info(token)
+def get_viewer_username(token, transport=None):
+    info = get_viewer_info(token, transport=transport)
     return info["username"] if info else None
 
-def get_viewer_id(token):
-    info = get_viewer_info(token)
+def get_viewer_id(token, transport=None):
+    info = get_viewer_info(token, transport=transport)
     return info["id"] if info else None
 
-def fetch_list(
-    user_id,
-    media_type,
-    auth_token=None,
-    statuses=None,
-    title_sub=None
-):
-    """
-    Fetches anime or manga list for a user.
-    - If auth_token is given, fetches with user auth (can include private entries).
-    - statuses: Optional list of status codes to filter (e.g. ["COMPLETED"])
-    - title_sub: Optional substring filter for title (case-insensitive)
-    Returns: entries (list of dicts)
-    """
-    query = '''
-    query ($userId: Int, $type: MediaType) {
-        MediaListCollection(userId: $userId, type: $type) {
-            lists {
-                name
-                isCustomList
-                entries {
+# AniList caps perChunk at 500 entries per MediaListCollection chunk
+DEFAULT_PER_CHUNK = 500
+
+# Projection profiles: each caller asks only for the fields it uses.
+# - minimal: media id and status, for presence checks
+# - standard: the fields the restore diff and field-level verification compare
+#   (see backup/diff.py DIFF_FIELDS)
+# - full: everything a backup keeps per entry
+LIST_PROFILES = {
+    "minimal": '''
+                    status
+                    media { id }
+''',
+    "standard": '''
                     status
                     score(format: POINT_10)
                     progress
                     progressVolumes
                     notes
                     private
+                    customLists
+                    startedAt { year month day }
+                    completedAt { year month day }
+                    media { id }
+''',
+    "full": '''
+                    status
+                    score(format: POINT_10)
+                    progress
+                    progressVolumes
+                    notes
+                    private
+                    updatedAt
+                    customLists
                     startedAt { year month day }
                     completedAt { year month day }
                     media {
@@ -92,40 +167,337 @@ def fetch_list(
                         title { romaji }
                         type
                     }
-                }
+''',
+}
+
+def _compact_custom_lists(entry):
+    # AniList returns {"List name": enabled, ...}, including every custom list the
+    # user has; only the names this entry belongs to are kept, and none at all if empty.
+    raw = entry.pop("customLists", None)
+    if isinstance(raw, dict):
+        names = [name for name, enabled in raw.items() if enabled]
+    else:
+        names = list(raw or [])
+    if names:
+        entry["customLists"] = names
+    return entry
+
+def iter_list_pages(
+    user_id,
+    media_type,
+    auth_token=None,
+    per_chunk=DEFAULT_PER_CHUNK,
+    statuses=None,
+    profile="full",
+    transport=None
+):
+    """
+    Fetches a user's anime or manga list chunk by chunk (MediaListCollection chunk/perChunk).
+    Yields one list of entries per chunk, so only a single chunk is held at a time.
+    - If auth_token is given, fetches with user auth (can include private entries).
+    - statuses: Optional list of status codes; filtered by AniList (status_in), so
+      entries with other statuses are never downloaded.
+    - profile: key of LIST_PROFILES selecting the fields fetched per entry.
+    An entry that sits in a status list and in custom lists is yielded once, with its
+    custom-list membership as a compact "customLists": [names] attribute.
+    """
+    query = '''
+    query ($userId: Int, $type: MediaType, $chunk: Int, $perChunk: Int, $statuses: [MediaListStatus]) {
+        MediaListCollection(userId: $userId, type: $type, chunk: $chunk, perChunk: $perChunk, status_in: $statuses) {
+            hasNextChunk
+            lists {
+                name
+                isCustomList
+                entries {%s}
             }
         }
     }
-    '''
-    variables = {'userId': user_id, 'type': media_type}
+    ''' % LIST_PROFILES[profile]
     headers = {}
     if auth_token:
         headers['Authorization'] = f'Bearer {auth_token}'
+    transport = transport or get_transport()
+    chunk = 1
+    seen = set()
     while True:
-        resp = requests.post(ANILIST_API, json={'query': query, 'variables': variables}, headers=headers)
+        variables = {'userId': user_id, 'type': media_type, 'chunk': chunk, 'perChunk': per_chunk}
+        if statuses:
+            variables['statuses'] = list(statuses)
+        resp = transport.post(ANILIST_API, json={'query': query, 'variables': variables}, headers=headers)
         if resp.status_code == 200:
-            data = resp.json()
-            lists = data["data"]["MediaListCollection"]["lists"]
-            entries = [entry for lst in lists for entry in lst["entries"]]
-            filtered = filter_entries(entries, statuses, title_sub)
-            return filtered
+            collection = response_json(resp)["data"]["MediaListCollection"]
+            # Status lists first, so custom lists only contribute entries hidden from them
+            lists = sorted(collection["lists"], key=lambda lst: bool(lst.get("isCustomList")))
+            page = []
+            for lst in lists:
+                for entry in lst["entries"]:
+                    media_id = entry["media"]["id"]
+                    if media_id not in seen:
+                        seen.add(media_id)
+                        page.append(_compact_custom_lists(entry))
+            yield page
+            if not collection.get("hasNextChunk"):
+                return
+            chunk += 1
         else:
             handled = handle_rate_limit(resp)
             if not handled:
                 raise Exception(f"Failed to fetch {media_type} list: HTTP {resp.status_code} {resp.text}")
 
+def iter_list(
+    user_id,
+    media_type,
+    auth_token=None,
+    statuses=None,
+    title_sub=None,
+    on_page=None,
+    profile="full",
+    transport=None
+):
+    """
+    Streams a user's list entry by entry, page by page.
+    - statuses: Optional list of status codes to filter (e.g. ["COMPLETED"]), applied by AniList
+    - title_sub: Optional substring filter for title (case-insensitive); needs a profile with titles
+    - on_page(page_number, entries_in_page): Optional progress callback per fetched page
+    - profile: key of LIST_PROFILES ("minimal", "standard" or "full")
+    """
+    pages = iter_list_pages(
+        user_id, media_type, auth_token=auth_token, statuses=statuses, profile=profile, transport=transport
+    )
+    for page_number, page in enumerate(pages, 1):
+        if on_page:
+            on_page(page_number, len(page))
+        yield from filter_entries(page, None, title_sub)
+
+def fetch_list(
+    user_id,
+    media_type,
+    auth_token=None,
+    statuses=None,
+    title_sub=None,
+    profile="full",
+    transport=None
+):
+    """
+    Fetches anime or manga list for a user.
+    - If auth_token is given, fetches with user auth (can include private entries).
+    - statuses: Optional list of status codes to filter (e.g. ["COMPLETED"])
+    - title_sub: Optional substring filter for title (case-insensitive)
+    Returns: entries (list of dicts)
+    """
+    return list(iter_list(
+        user_id, media_type,
+        auth_token=auth_token,
+        statuses=statuses,
+        title_sub=title_sub,
+        profile=profile,
+        transport=transport
+    ))
+
+DEFAULT_LOOKUP_BATCH_SIZE = 25
+
+def _is_not_found_error(err):
+    return err.get("status") == 404 or "not found" in err.get("message", "").lower()
+
+def fetch_list_entries(user_id, media_ids, auth_token=None, profile="minimal", transport=None):
+    """
+    Looks up only the given media ids on a user's list, using aliased
+    MediaList(userId, mediaId) queries instead of downloading the whole list.
+    - profile: key of LIST_PROFILES selecting the fields per entry (id and mediaId are always added).
+    Returns: {media_id: entry} for the ids that are on the list.
+    Raises an Exception if AniList rejects a lookup as a whole (bad token, server
+    error, ...) instead of reporting those entries as missing. The batch size halves
+    whenever AniList rejects a document as too complex.
+    """
+    headers = {}
+    if auth_token:
+        headers['Authorization'] = f'Bearer {auth_token}'
+    transport = transport or get_transport()
+    media_ids = list(media_ids)
+    fields = " ".join(LIST_PROFILES[profile].split())
+    batch_size = DEFAULT_LOOKUP_BATCH_SIZE
+    found = {}
+    pos = 0
+    while pos < len(media_ids):
+        batch = media_ids[pos:pos + batch_size]
+        calls = [
+            f"  m{idx}: MediaList(userId: $userId, mediaId: {int(mid)}) {{ id mediaId {fields} }}"
+            for idx, mid in enumerate(batch)
+        ]
+        query = "query ($userId: Int) {\n" + "\n".join(calls) + "\n}"
+        while True:
+            resp = transport.post(ANILIST_API, json={'query': query, 'variables': {'userId': user_id}}, headers=headers)
+            if resp.status_code == 200 or not handle_rate_limit(resp):
+                break
+        try:
+            body = response_json(resp)
+        except Exception:
+            raise Exception(f"Failed to look up list entries: HTTP {resp.status_code} {resp.text}")
+        errors = body.get("errors") or []
+        if _is_complexity_error(errors):
+            if batch_size == 1:
+                raise Exception(f"Failed to look up list entries: {errors[0].get('message')}")
+            batch_size = max(1, batch_size // 2)
+            continue
+        data = body.get("data")
+        # Ids missing from the list come back as per-alias "Not Found" errors, which
+        # can turn the whole response into a 404 while the other aliases still resolve.
+        # Anything else (no data at all, other errors on a non-200) fails the lookup.
+        if not isinstance(data, dict) or (
+            resp.status_code != 200 and not all(_is_not_found_error(err) for err in errors)
+        ):
+            message = errors[0].get("message") if errors else resp.text
+            raise Exception(f"Failed to look up list entries: HTTP {resp.status_code} {message}")
+        for idx in range(len(batch)):
+            item = data.get(f"m{idx}")
+            if item:
+                found[item["mediaId"]] = _compact_custom_lists(item)
+        pos += len(batch)
+    return found
+
+SAVE_ENTRY_ARGS = [
+    ("mediaId", "Int"),
+    ("status", "MediaListStatus"),
+    ("score", "Float"),
+    ("progress", "Int"),
+    ("progressVolumes", "Int"),
+    ("notes", "String"),
+    ("startedAt", "FuzzyDateInput"),
+    ("completedAt", "FuzzyDateInput"),
+    ("private", "Boolean"),
+    ("customLists", "[String]"),
+]
+
+# AniList rejects documents above its query complexity limit; batches shrink
+# automatically when that happens, so this is only the starting size.
+DEFAULT_RESTORE_BATCH_SIZE = 25
+
+class QueryTooComplex(Exception):
+    pass
+
+def _entry_variables(entry):
+    # Fields absent from the entry are left untouched on AniList (patch entries
+    # from backup/diff.py carry only the fields that changed).
+    score = entry.get("score")
+    variables = {
+        "mediaId": entry["media"]["id"],
+        "status": entry.get("status"),
+        "score": float(score) if score is not None else None,
+        "progress": entry.get("progress"),
+        "progressVolumes": entry.get("progressVolumes"),
+        "notes": entry.get("notes"),
+        "private": entry.get("private"),
+        "startedAt": entry.get("startedAt"),
+        "completedAt": entry.get("completedAt"),
+        "customLists": entry.get("customLists"),
+    }
+    return {k: v for k, v in variables.items() if v is not None}
+
+def build_batch_mutation(entries):
+    """
+    Packs several SaveMediaListEntry calls into one aliased mutation document.
+    Alias eN (and variables suffixed _N) belong to entries[N].
+    Returns: (document, variables)
+    """
+    declarations = []
+    calls = []
+    variables = {}
+    for idx, entry in enumerate(entries):
+        entry_vars = _entry_variables(entry)
+        args = []
+        for name, gql_type in SAVE_ENTRY_ARGS:
+            if name not in entry_vars:
+                continue
+            var_name = f"{name}_{idx}"
+            declarations.append(f"${var_name}: {gql_type}")
+            args.append(f"{name}: ${var_name}")
+            variables[var_name] = entry_vars[name]
+        calls.append(f"  e{idx}: SaveMediaListEntry({', '.join(args)}) {{ id mediaId status }}")
+    document = "mutation (" + ", ".join(declarations) + ") {\n" + "\n".join(calls) + "\n}"
+    return document, variables
+
+def _is_complexity_error(errors):
+    for err in errors:
+        if "complexity" in err.get("message", "").lower():
+            return True
+    return False
+
+def _restore_halves(entries, auth_token, transport, stop):
+    # A document-level error (e.g. one entry with an invalid variable value) names no
+    # alias: bisect the batch until each failure is pinned to the entry that caused it
+    mid = len(entries) // 2
+    return (
+        restore_batch(entries[:mid], auth_token, transport=transport, stop=stop)
+        + restore_batch(entries[mid:], auth_token, transport=transport, stop=stop)
+    )
+
+def restore_batch(entries, auth_token, transport=None, stop=None):
+    """
+    Restores a batch of entries with one aliased SaveMediaListEntry mutation.
+    Per-alias errors are mapped back to the entry they belong to; if AniList
+    rejects the whole document (no data at all), the batch is split in halves
+    and retried so only the offending entries fail.
+    Returns: one item per entry, in order: the saved list entry as AniList
+    reported it ({"id", "mediaId", "status"}), or None if that entry failed.
+    Raises QueryTooComplex if AniList rejects the document as too complex, and
+    RequestCancelled (without sending anything more) once `stop` is set.
+    """
+    document, variables = build_batch_mutation(entries)
+    headers = {
+        "Authorization": f"Bearer {auth_token}"
+    }
+    transport = transport or get_transport()
+    while True:
+        try:
+            resp = transport.post(ANILIST_API, json={"query": document, "variables": variables}, headers=headers, stop=stop)
+        except NETWORK_ERRORS:
+            return [None] * len(entries)  # retries exhausted; the entries go to the failed file
+        if resp.status_code == 200:
+            break
+        if handle_rate_limit(resp, stop):
+            continue
+        try:
+            body = response_json(resp)
+        except Exception:
+            return [None] * len(entries)
+        errors = body.get("errors") or []
+        if _is_complexity_error(errors):
+            raise QueryTooComplex(errors[0].get("message"))
+        if not body.get("data"):
+            if len(entries) > 1 and resp.status_code < 500:
+                return _restore_halves(entries, auth_token, transport, stop)
+            return [None] * len(entries)
+        break
+    body = response_json(resp)
+    data = body.get("data")
+    if data is None and body.get("errors") and len(entries) > 1:
+        return _restore_halves(entries, auth_token, transport, stop)
+    data = data or {}
+    failed_aliases = set()
+    for err in body.get("errors") or []:
+        path = err.get("path") or []
+        if path:
+            failed_aliases.add(path[0])
+    results = []
+    for idx in range(len(entries)):
+        alias = f"e{idx}"
+        saved = data.get(alias)
+        results.append(saved if saved and alias not in failed_aliases else None)
+    return results
+
 def restore_entry(
     entry,
     media_type,
     auth_token,
-    auto_create_custom_lists=True
+    auto_create_custom_lists=True,
+    transport=None
 ):
     """
     Restores a single entry using SaveMediaListEntry mutation.
     Returns: True if success, False otherwise.
     """
     mutation = '''
-    mutation ($mediaId: Int, $status: MediaListStatus, $score: Float, $progress: Int, $progressVolumes: Int, $notes: String, $startedAt: FuzzyDateInput, $completedAt: FuzzyDateInput, $private: Boolean) {
+    mutation ($mediaId: Int, $status: MediaListStatus, $score: Float, $progress: Int, $progressVolumes: Int, $notes: String, $startedAt: FuzzyDateInput, $completedAt: FuzzyDateInput, $private: Boolean, $customLists: [String]) {
       SaveMediaListEntry(
         mediaId: $mediaId,
         status: $status,
@@ -135,30 +507,26 @@ def restore_entry(
         notes: $notes,
         startedAt: $startedAt,
         completedAt: $completedAt,
-        private: $private
+        private: $private,
+        customLists: $customLists
       ) {
         id
         status
       }
     }
     '''
-    variables = {
-        "mediaId": entry["media"]["id"],
-        "status": entry.get("status"),
-        "score": float(entry.get("score", 0)),
-        "progress": entry.get("progress"),
-        "progressVolumes": entry.get("progressVolumes"),
-        "notes": entry.get("notes"),
-        "private": entry.get("private"),
-        "startedAt": entry.get("startedAt"),
-        "completedAt": entry.get("completedAt"),
-    }
-    variables = {k: v for k, v in variables.items() if v is not None}
+    variables = _entry_variables(entry)
+    if not auto_create_custom_lists:
+        variables.pop("customLists", None)
     headers = {
         "Authorization": f"Bearer {auth_token}"
     }
+    transport = transport or get_transport()
     while True:
-        resp = requests.post(ANILIST_API, json={"query": mutation, "variables": variables}, headers=headers)
+        try:
+            resp = transport.post(ANILIST_API, json={"query": mutation, "variables": variables}, headers=headers)
+        except NETWORK_ERRORS:
+            return False
         if resp.status_code == 200:
             return True
         else:
@@ -166,13 +534,20 @@ def restore_entry(
             if not handled:
                 return False
 
-def test_token(token):
+def test_token(token, transport=None):
     """
     Verifies if an AniList OAuth token is valid.
     """
+    if _identity_get("viewer", token):
+        return True
     query = '''
     query { Viewer { id name } }
     '''
     headers = { "Authorization": f"Bearer {token}" }
-    resp = requests.post(ANILIST_API, json={"query": query}, headers=headers)
-    return resp.status_code == 200
\ No newline at end of file
+    transport = transport or get_transport()
+    resp = transport.post(ANILIST_API, json={"query": query}, headers=headers)
+    if resp.status_code == 200:
+        viewer = response_json(resp)["data"]["Viewer"]
+        _identity_put("viewer", token, {"id": viewer["id"], "username": viewer["name"]})
+        return True
+    return False
\ No newline at end of file
@@ -10,9 +10,10 @@ Handles AniList OAuth and multi-account management:
 """
 
 import os
-import json
-import requests
 import urllib.parse
+from anilist.transport import get_transport
+from anilist.api import invalidate_identity_cache
+from anilist.jsoncodec import load, dump, response_json
 from ui.prompts import prompt_boxed, print_info, print_error, print_warning, menu_boxed
 from ui.helptext import AUTH_CLIENT_ID_HELP, AUTH_CLIENT_SECRET_HELP, AUTH_REDIRECT_URL_HELP
 
@@ -36,7 +37,7 @@ def _load_accounts():
     if os.path.isfile(path):
         try:
             with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+                return load(f)
         except Exception:
             return {}
     return {}
@@ -45,7 +46,7 @@ def _save_accounts(accounts):
     path = _get_accounts_path()
     try:
         with open(path, "w", encoding="utf-8") as f:
-            json.dump(accounts, f, indent=2)
+            dump(accounts, f, pretty=True)
     except Exception as e:
         print_error(f"Failed to save accounts: {e}")
 
@@ -62,6 +63,9 @@ def get_saved_token(username):
 
 def save_account_token(username, token, client_id=None, client_secret=None):
     accounts = _load_accounts()
+    previous = accounts.get(username)
+    if previous:
+        invalidate_identity_cache(token=previous.get("token"), username=username)
     accounts[username] = {
         "token": token,
         "client_id": client_id,
@@ -72,6 +76,7 @@ def save_account_token(username, token, client_id=None, client_secret=None):
 def remove_account(username):
     accounts = _load_accounts()
     if username in accounts:
+        invalidate_identity_cache(token=accounts[username].get("token"), username=username)
         del accounts[username]
         _save_accounts(accounts)
 
@@ -124,7 +129,7 @@ def get_auth_code_from_user(auth_url):
         return code
     raise Exception("No 'code' parameter found in the URL.")
 
-def exchange_code_for_token(client_id, client_secret, code, redirect_uri=REDIRECT_URI):
+def exchange_code_for_token(client_id, client_secret, code, redirect_uri=REDIRECT_URI, transport=None):
     data = {
         "grant_type": "authorization_code",
         "client_id": client_id,
@@ -132,9 +137,10 @@ def exchange_code_for_token(client_id, client_secret, code, redirect_uri=REDIREC
         "redirect_uri": redirect_uri,
         "code": code
     }
-    resp = requests.post(OAUTH_TOKEN_URL, data=data)
+    transport = transport or get_transport()
+    resp = transport.post(OAUTH_TOKEN_URL, data=data)
     if resp.status_code == 200:
-        return resp.json()["access_token"]
+        return response_json(resp)["access_token"]
     print_error(f"Failed to obtain token: {resp.status_code} {resp.text}")
     return None
 
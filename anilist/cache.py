@@ -0,0 +1,121 @@
+"""
+anilist/cache.py
+
+Persistent response cache for AniList identity lookups, shared across runs:
+- Lives in ~/AniPort/.aniport_cache.json (next to the accounts and MOTD files)
+- Per-kind TTLs (username -> id, viewer info per token)
+- Bounded size with least-recently-used eviction
+- Bypass with ANIPORT_NO_CACHE=1 or set_cache_bypass(True)
+
+Tokens are never written to disk; viewer entries are keyed by a SHA-256 of the token.
+"""
+
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from anilist.jsoncodec import load, dump
+
+CACHE_TTLS = {
+    "user": 7 * 24 * 3600,    # username -> user id (ids never change; names rarely do)
+    "viewer": 24 * 3600,      # token -> {"id", "username"}
+}
+MAX_CACHE_ENTRIES = 1000
+
+_state = {"bypass": os.getenv("ANIPORT_NO_CACHE", "") not in ("", "0")}
+
+def _get_cache_path():
+    # Save in ~/AniPort/.aniport_cache.json
+    home = os.path.expanduser("~")
+    aniport_dir = os.path.join(home, "AniPort")
+    if not os.path.exists(aniport_dir):
+        try:
+            os.makedirs(aniport_dir, exist_ok=True)
+        except Exception:
+            pass
+    return os.path.join(aniport_dir, ".aniport_cache.json")
+
+def set_cache_bypass(bypass=True):
+    _state["bypass"] = bypass
+
+def cache_key(kind, key):
+    if kind == "viewer":
+        key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return f"{kind}:{key}"
+
+class ResponseCache:
+    """
+    Small JSON-backed cache. Items are stored in least-recently-used order, so
+    eviction just drops from the front. Every write replaces the file atomically.
+    """
+
+    def __init__(self, path=None, max_entries=MAX_CACHE_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.items = None
+        self.lock = threading.Lock()
+
+    def _load(self):
+        if self.items is not None:
+            return
+        self.path = self.path or _get_cache_path()
+        self.items = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.items = load(f)
+            except Exception:
+                self.items = {}
+
+    def _save(self):
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=os.path.dirname(self.path))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                dump(self.items, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            pass
+
+    def get(self, kind, key):
+        if _state["bypass"]:
+            return None
+        with self.lock:
+            self._load()
+            name = cache_key(kind, key)
+            item = self.items.get(name)
+            if item is None:
+                return None
+            if item["expires"] < time.time():
+                del self.items[name]
+                self._save()
+                return None
+            # Move to the most-recently-used end
+            self.items[name] = self.items.pop(name)
+            return item["value"]
+
+    def put(self, kind, key, value):
+        if _state["bypass"]:
+            return
+        with self.lock:
+            self._load()
+            name = cache_key(kind, key)
+            self.items.pop(name, None)
+            self.items[name] = {"value": value, "expires": time.time() + CACHE_TTLS[kind]}
+            while len(self.items) > self.max_entries:
+                del self.items[next(iter(self.items))]
+            self._save()
+
+    def invalidate(self, kind, key):
+        with self.lock:
+            self._load()
+            if self.items.pop(cache_key(kind, key), None) is not None:
+                self._save()
+
+    def clear(self):
+        with self.lock:
+            self._load()
+            self.items = {}
+            self._save()
+
+response_cache = ResponseCache()
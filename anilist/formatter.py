@@ -3,24 +3,176 @@ anilist/formatter.py
 
 Formats AniList entries for backup/restore.
 - Filters by status/title
+- Filter expressions compiled once into a single predicate (status, score and
+  progress ranges, start/completion date ranges, title regex, private flag,
+  custom-list membership), used on both export and import
 - Ensures JSON structure is uniform for export/import
 
 Can be extended for future format options.
+
+Filter expression syntax (terms separated by spaces, all must match; quote
+values containing spaces):
+    status=COMPLETED,PAUSED     score>=7  score<=9  score=10
+    progress>=12                started>=2020  completed<=2023-06-30
+    title~"^one piece"          private=yes|no     list=Favourites,Rewatch
 """
 
-def filter_entries(entries, statuses=None, title=None):
+import re
+import shlex
+
+FILTER_STATUSES = ("COMPLETED", "CURRENT", "DROPPED", "PAUSED", "PLANNING", "REPEATING")
+_TERM_RE = re.compile(r"^(\w+)\s*(>=|<=|=|~)(.*)$", re.S)
+_DATE_FIELDS = {"started": "startedAt", "completed": "completedAt"}
+_NUMBER_FIELDS = {"score": "score", "progress": "progress", "volumes": "progressVolumes"}
+
+class FilterError(ValueError):
+    pass
+
+def _parse_date(text):
+    parts = text.split("-")
+    try:
+        values = [int(p) for p in parts]
+    except ValueError:
+        raise FilterError(f"Invalid date '{text}' (use YYYY, YYYY-MM or YYYY-MM-DD).")
+    if not 1 <= len(values) <= 3:
+        raise FilterError(f"Invalid date '{text}' (use YYYY, YYYY-MM or YYYY-MM-DD).")
+    return values
+
+def _date_bound(values, upper):
+    # A partial date covers its whole month/year: started<=2020 includes December 2020
+    fill = 99 if upper else 0
+    return tuple(values + [fill] * (3 - len(values)))
+
+def _entry_date(entry, field):
+    date = entry.get(field) or {}
+    if not date.get("year"):
+        return None
+    return (date["year"], date.get("month") or 0, date.get("day") or 0)
+
+def parse_filter_expression(expression):
+    """
+    Parses a filter expression into a spec dict:
+    {"status": set, "score": [min, max], "progress": [min, max], "volumes": [min, max],
+     "started": [min, max], "completed": [min, max], "title": regex string,
+     "private": bool, "lists": set}
+    Raises FilterError on malformed expressions.
+    """
+    spec = {}
+    try:
+        terms = shlex.split(expression or "")
+    except ValueError as e:
+        raise FilterError(f"Invalid filter expression: {e}")
+    for term in terms:
+        match = _TERM_RE.match(term)
+        if not match:
+            raise FilterError(f"Invalid filter term '{term}'.")
+        key, op, value = match.group(1).lower(), match.group(2), match.group(3).strip()
+        if key == "status" and op == "=":
+            statuses = {s.strip().upper() for s in value.split(",") if s.strip()}
+            if not statuses:
+                raise FilterError("'status' needs at least one status.")
+            unknown = statuses - set(FILTER_STATUSES)
+            if unknown:
+                raise FilterError(f"Unknown status: {', '.join(sorted(unknown))}")
+            spec["status"] = statuses
+        elif key in _NUMBER_FIELDS and op in (">=", "<=", "="):
+            try:
+                number = float(value)
+            except ValueError:
+                raise FilterError(f"'{key}' needs a number, got '{value}'.")
+            bounds = spec.setdefault(key, [None, None])
+            if op in (">=", "="):
+                bounds[0] = number
+            if op in ("<=", "="):
+                bounds[1] = number
+        elif key in _DATE_FIELDS and op in (">=", "<=", "="):
+            values = _parse_date(value)
+            bounds = spec.setdefault(key, [None, None])
+            if op in (">=", "="):
+                bounds[0] = _date_bound(values, upper=False)
+            if op in ("<=", "="):
+                bounds[1] = _date_bound(values, upper=True)
+        elif key == "title" and op in ("~", "="):
+            spec["title"] = value if op == "~" else re.escape(value)
+        elif key == "private" and op == "=":
+            if value.lower() not in ("yes", "no", "true", "false"):
+                raise FilterError("'private' must be yes or no.")
+            spec["private"] = value.lower() in ("yes", "true")
+        elif key == "list" and op == "=":
+            spec["lists"] = {name.strip() for name in value.split(",") if name.strip()}
+            if not spec["lists"]:
+                raise FilterError("'list' needs at least one custom list name.")
+        else:
+            raise FilterError(f"Unsupported filter term '{term}'.")
+    return spec
+
+def compile_filter(spec=None, statuses=None, title=None, expression=None):
+    """
+    Compiles filters into one predicate(entry) -> bool. Accepts a spec dict from
+    parse_filter_expression, an expression string, and/or the classic status set
+    and case-insensitive title substring. Returns None when nothing filters.
+    Raises FilterError for invalid input.
+    """
+    spec = dict(spec or {})
+    if expression:
+        spec.update(parse_filter_expression(expression))
+    checks = []
+
+    status_sets = [set(s) for s in (statuses, spec.get("status")) if s]
+    if status_sets:
+        wanted_status = set.intersection(*status_sets)
+        checks.append(lambda e: e.get("status") in wanted_status)
+
+    for key, field in _NUMBER_FIELDS.items():
+        if key in spec:
+            low, high = spec[key]
+            low = float("-inf") if low is None else low
+            high = float("inf") if high is None else high
+            checks.append(lambda e, f=field, lo=low, hi=high: lo <= (e.get(f) or 0) <= hi)
+
+    for key, field in _DATE_FIELDS.items():
+        if key in spec:
+            low, high = spec[key]
+            low = low or (0, 0, 0)
+            high = high or (9999, 99, 99)
+            def check_date(e, f=field, lo=low, hi=high):
+                date = _entry_date(e, f)
+                return date is not None and lo <= date <= hi
+            checks.append(check_date)
+
+    patterns = []
+    if title:
+        patterns.append(re.escape(title))
+    if spec.get("title"):
+        patterns.append(spec["title"])
+    for pattern in patterns:
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            raise FilterError(f"Invalid title pattern '{pattern}': {e}")
+        checks.append(lambda e, r=regex: r.search(((e.get("media") or {}).get("title") or {}).get("romaji") or "") is not None)
+
+    if "private" in spec:
+        checks.append(lambda e, p=spec["private"]: bool(e.get("private")) == p)
+
+    if spec.get("lists"):
+        checks.append(lambda e, names=frozenset(spec["lists"]): not names.isdisjoint(e.get("customLists") or ()))
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda e: all(check(e) for check in checks)
+
+def filter_entries(entries, statuses=None, title=None, predicate=None):
     """
-    Filter entries by statuses (list of codes) and/or substring in title (case-insensitive).
+    Filter entries by statuses (list of codes) and/or substring in title (case-insensitive),
+    or by a predicate from compile_filter. The filter is compiled once per call.
     """
     if not entries:
         return []
-    filtered = []
-    for entry in entries:
-        if statuses and entry.get("status") not in statuses:
-            continue
-        if title:
-            t = entry.get("media", {}).get("title", {}).get("romaji", "")
-            if title.lower() not in t.lower():
-                continue
-        filtered.append(entry)
-    return filtered
\ No newline at end of file
+    if predicate is None:
+        predicate = compile_filter(statuses=statuses, title=title)
+    if predicate is None:
+        return list(entries)
+    return [entry for entry in entries if predicate(entry)]
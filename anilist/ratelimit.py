@@ -2,18 +2,234 @@
 anilist/ratelimit.py
 
 Handles AniList API rate limiting and exponential backoff.
+- Proactive pacing: a token bucket sized from X-RateLimit-Limit and kept honest
+  by X-RateLimit-Remaining, so requests are spread out instead of hitting 429s.
+- Reactive fallback: handle_rate_limit() still waits out any 429 that slips through.
+- Host-wide budget: the default limiter keeps its bucket in ~/AniPort/.aniport_ratelimit.json
+  under an exclusive file lock, so every AniPort process on the machine paces
+  against the same budget, and a relaunch right after a 429 still honours it.
 """
 
+import os
 import time
 import sys
+import threading
+from contextlib import contextmanager
+from anilist.jsoncodec import loads, dumps, response_json
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
 
 rate_limit_counter = {"count": 0}
 
-def handle_rate_limit(resp):
+class RequestCancelled(Exception):
+    """
+    Raised instead of sending (or waiting to send) a request once the caller's stop event is set.
+    """
+
+def cancellable_sleep(seconds, stop=None):
+    """
+    Sleeps for `seconds`, or raises RequestCancelled as soon as `stop` (a threading.Event) is set.
+    """
+    if stop is None:
+        time.sleep(seconds)
+    elif stop.wait(seconds):
+        raise RequestCancelled()
+
+# AniList's documented budget; replaced by X-RateLimit-Limit once a response arrives.
+DEFAULT_LIMIT_PER_MINUTE = 90
+RATE_WINDOW_SECONDS = 60
+
+class TokenBucketLimiter:
+    """
+    Token bucket refilled at limit/60 tokens per second.
+    acquire() reserves one token (sleeping if the bucket is empty) before a request;
+    update(resp) resyncs the bucket with the rate-limit headers of the response.
+    Thread-safe: concurrent callers each reserve their own slot.
+    """
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, limit=DEFAULT_LIMIT_PER_MINUTE):
+        self.lock = threading.Lock()
+        self.limit = limit
+        self.tokens = float(limit)
+        self.updated = self.clock()
+        self.penalty_until = 0.0
+
+    @contextmanager
+    def _state(self):
+        # Guards every read-modify-write of the bucket
+        with self.lock:
+            yield
+
+    @property
+    def rate(self):
+        return self.limit / RATE_WINDOW_SECONDS
+
+    def _refill(self, now):
+        # max(): a wall clock stepping backwards must not drain the bucket
+        self.tokens = min(float(self.limit), self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """
+        Takes one token and returns how many seconds the caller must wait before sending.
+        """
+        with self._state():
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0
+            if self.tokens < 0:
+                wait = -self.tokens / self.rate
+            return max(wait, self.penalty_until - now)
+
+    def acquire(self, stop=None):
+        wait = self.reserve()
+        if wait > 0:
+            cancellable_sleep(wait, stop)
+
+    def update(self, resp):
+        headers = resp.headers
+        with self._state():
+            now = self.clock()
+            self._refill(now)
+            limit = _int_header(headers, "X-RateLimit-Limit")
+            if limit and limit > 0:
+                self.limit = limit
+            remaining = _int_header(headers, "X-RateLimit-Remaining")
+            if remaining is not None:
+                self.tokens = min(self.tokens, float(remaining))
+            if resp.status_code == 429:
+                self.tokens = min(self.tokens, 0.0)
+                retry_after = _int_header(headers, "Retry-After")
+                if retry_after:
+                    self.penalty_until = max(self.penalty_until, now + retry_after)
+
+    def snapshot(self):
+        """
+        Returns (limit, tokens available now) for display and estimates.
+        """
+        with self._state():
+            self._refill(self.clock())
+            return self.limit, max(0.0, self.tokens)
+
+def _int_header(headers, name):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def _get_state_path():
+    # Save in ~/AniPort/.aniport_ratelimit.json
+    home = os.path.expanduser("~")
+    aniport_dir = os.path.join(home, "AniPort")
+    if not os.path.exists(aniport_dir):
+        try:
+            os.makedirs(aniport_dir, exist_ok=True)
+        except Exception:
+            pass
+    return os.path.join(aniport_dir, ".aniport_ratelimit.json")
+
+def _open_locked(path):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    f = os.fdopen(fd, "r+")
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        elif msvcrt:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+def _unlock_close(f):
+    try:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        elif msvcrt:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        f.close()
+
+class SharedTokenBucketLimiter(TokenBucketLimiter):
+    """
+    Token bucket whose state (limit, tokens, last refill, penalty-until) lives in a
+    small JSON file guarded by an exclusive lock, shared by every process on the host.
+    Timestamps are wall-clock so they stay meaningful across processes and restarts.
+    If the file can't be used, it quietly falls back to an in-process bucket.
+    """
+
+    clock = staticmethod(time.time)
+
+    def __init__(self, path=None, limit=DEFAULT_LIMIT_PER_MINUTE):
+        super().__init__(limit)
+        self.path = path
+        self.shared = True
+
+    @contextmanager
+    def _state(self):
+        with self.lock:
+            f = None
+            if self.shared:
+                try:
+                    self.path = self.path or _get_state_path()
+                    f = _open_locked(self.path)
+                except OSError:
+                    self.shared = False
+            if f is None:
+                yield
+                return
+            try:
+                self._read(f)
+                yield
+                self._write(f)
+            finally:
+                _unlock_close(f)
+
+    def _read(self, f):
+        f.seek(0)
+        try:
+            state = loads(f.read() or "{}")
+        except ValueError:
+            return  # torn or foreign content: keep our own view and overwrite it
+        if state:
+            self.limit = state.get("limit", self.limit)
+            self.tokens = float(state.get("tokens", self.tokens))
+            self.updated = float(state.get("updated", self.updated))
+            self.penalty_until = float(state.get("penalty_until", self.penalty_until))
+
+    def _write(self, f):
+        f.seek(0)
+        f.truncate()
+        f.write(dumps({
+            "limit": self.limit,
+            "tokens": self.tokens,
+            "updated": self.updated,
+            "penalty_until": self.penalty_until,
+        }))
+        f.flush()
+
+default_limiter = SharedTokenBucketLimiter()
+
+def handle_rate_limit(resp, stop=None):
     """
     Detects AniList API rate limits.
     If rate limited, shows a spinner animation and waits for Retry-After seconds.
     Returns True if handled (should retry), or False if not a rate limit.
+    Raises RequestCancelled if `stop` is set during the wait.
     """
     try:
         from tqdm import tqdm
@@ -42,6 +258,10 @@ def handle_rate_limit(resp):
         frame = 0
         try:
             while time.time() - start < wait:
+                if stop is not None and stop.is_set():
+                    sys.stdout.write('\r' + ' ' * 40 + '\r')
+                    sys.stdout.flush()
+                    raise RequestCancelled()
                 sys.stdout.write(color_text('\r' + f"[{spinner[frame % len(spinner)]}] Waiting...", "YELLOW"))
                 sys.stdout.flush()
                 time.sleep(0.12)
@@ -73,7 +293,7 @@ def handle_rate_limit(resp):
 
     # Sometimes 400 with rate limit error in body
     try:
-        data = resp.json()
+        data = response_json(resp)
         if "errors" in data:
             for err in data["errors"]:
                 if "rate limit" in err.get("message", "").lower():
@@ -0,0 +1,242 @@
+"""
+anilist/transport.py
+
+Shared HTTP transport for every AniList call:
+- One pooled requests.Session (keep-alive, no TCP+TLS handshake per call)
+- Default headers, gzip negotiation and per-call timeouts
+- JSON request bodies encoded by the shared codec (anilist/jsoncodec.py)
+- Proactive pacing through the shared token-bucket limiter (anilist/ratelimit.py)
+- Measured request latency (EWMA) for live time estimates
+- Retries for 5xx responses and network errors: exponential backoff with full
+  jitter, capped by a retry budget so retries never swamp a struggling API
+- A circuit breaker that pauses every caller while AniList is down, instead of
+  letting a restore or export burn through its queue with failures
+- A process-wide default instance, injectable into every API function
+"""
+
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from anilist.ratelimit import default_limiter, cancellable_sleep, RequestCancelled
+from anilist.jsoncodec import dumps_bytes
+
+DEFAULT_TIMEOUT = (10, 60)  # (connect, read) seconds
+DEFAULT_POOL_SIZE = 10
+LATENCY_EWMA_ALPHA = 0.2  # weight of the newest sample
+
+RETRYABLE_STATUS = {500, 502, 503, 504}
+STOP_POLL_INTERVAL = 0.25  # seconds between stop-event checks while the circuit is open
+NETWORK_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "AniPort (https://github.com/itzraiyan/AniPort)",
+}
+
+def _notify(msg, color="YELLOW"):
+    try:
+        from ui.colors import color_text
+        msg = color_text(msg, color)
+    except ImportError:
+        pass
+    try:
+        from tqdm import tqdm
+        tqdm.write(msg)
+    except ImportError:
+        print(msg)
+
+class RetryPolicy:
+    """
+    Decides whether and when to retry a failed call.
+    - Up to max_attempts tries per call, waiting a random time in
+      [0, min(max_delay, base_delay * 2**retry)] between them (full jitter), or
+      longer if the server sent Retry-After.
+    - Retry budget: every request earns budget_ratio retry tokens (up to
+      max_budget) and every retry spends one, so during a long outage retries
+      stay a small fraction of traffic instead of multiplying it.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=30.0, budget_ratio=0.2, max_budget=20):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.max_budget = max_budget
+        self.budget = float(max_budget)
+        self.lock = threading.Lock()
+
+    def record_request(self):
+        with self.lock:
+            self.budget = min(self.max_budget, self.budget + self.budget_ratio)
+
+    def allow_retry(self, attempt):
+        """
+        attempt is the number of tries made so far. Spends a budget token if allowed.
+        """
+        if attempt >= self.max_attempts:
+            return False
+        with self.lock:
+            if self.budget < 1:
+                return False
+            self.budget -= 1
+            return True
+
+    def delay(self, attempt, resp=None):
+        wait = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                wait = max(wait, min(self.max_delay, float(retry_after)))
+            except ValueError:
+                pass
+        return wait
+
+class CircuitBreaker:
+    """
+    Stops traffic to AniList while it is failing.
+    - closed: requests flow; failure_threshold consecutive failures open the circuit.
+    - open: before_request() blocks every caller until the cooldown is over.
+    - half-open: one probe request goes through while the others keep waiting;
+      success closes the circuit, failure reopens it with a doubled cooldown
+      (up to max_cooldown).
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=15.0, max_cooldown=300.0):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.state = "closed"
+        self.open_until = 0.0
+        self.condition = threading.Condition()
+
+    def before_request(self, stop=None):
+        with self.condition:
+            while True:
+                if stop is not None and stop.is_set():
+                    raise RequestCancelled()
+                if self.state == "closed":
+                    return
+                now = time.monotonic()
+                if self.state == "open" and now >= self.open_until:
+                    self.state = "half-open"
+                    return  # this caller is the probe
+                wait = self.open_until - now if self.state == "open" else None
+                if stop is not None:
+                    # Nothing notifies the condition when stop is set, so poll it
+                    wait = STOP_POLL_INTERVAL if wait is None else min(wait, STOP_POLL_INTERVAL)
+                self.condition.wait(wait)
+
+    def release_probe(self):
+        # The probe ended without telling us anything (e.g. Ctrl+C): let the next caller probe
+        with self.condition:
+            if self.state == "half-open":
+                self.state = "open"
+                self.open_until = time.monotonic()
+                self.condition.notify_all()
+
+    def record_success(self):
+        with self.condition:
+            if self.state != "closed":
+                _notify("AniList is responding again. Resuming...", color="GREEN")
+            self.state = "closed"
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self.condition.notify_all()
+
+    def record_failure(self):
+        with self.condition:
+            self.failures += 1
+            if self.state == "half-open":
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            elif self.state == "open" or self.failures < self.failure_threshold:
+                return
+            self.state = "open"
+            self.open_until = time.monotonic() + self.cooldown
+            _notify(f"AniList seems to be down. Pausing for {self.cooldown:.0f} seconds (press Ctrl+C to cancel)...")
+            self.condition.notify_all()
+
+class AniListTransport:
+    """
+    Owns a pooled requests.Session. All AniList requests go through post(),
+    so connections are reused, every call gets a timeout, every call is
+    paced by the rate limiter and transient failures are retried.
+    post() returns the last response once retries are used up (callers handle
+    non-200 as before) and re-raises the last network error if there was no response.
+    With stop= (a threading.Event), every wait (circuit breaker, rate limiter,
+    retry backoff) ends early and post() raises RequestCancelled instead of sending
+    once the event is set.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE, limiter=None, retry=None, breaker=None):
+        self.timeout = timeout
+        self.limiter = limiter or default_limiter
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = None  # EWMA of request round-trip time in seconds
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+
+    def post(self, url, json=None, data=None, headers=None, timeout=None, stop=None):
+        if json is not None:
+            data = dumps_bytes(json)
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_request(stop)
+            try:
+                self.limiter.acquire(stop)
+                if stop is not None and stop.is_set():
+                    raise RequestCancelled()
+                self.retry.record_request()
+                sent = time.monotonic()
+                resp = self.session.post(
+                    url, data=data, headers=headers,
+                    timeout=timeout or self.timeout
+                )
+            except NETWORK_ERRORS:
+                self.breaker.record_failure()
+                if not self.retry.allow_retry(attempt):
+                    raise
+                cancellable_sleep(self.retry.delay(attempt), stop)
+                continue
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            self._record_latency(time.monotonic() - sent)
+            self.limiter.update(resp)
+            if resp.status_code not in RETRYABLE_STATUS:
+                self.breaker.record_success()
+                return resp
+            self.breaker.record_failure()
+            if not self.retry.allow_retry(attempt):
+                return resp
+            cancellable_sleep(self.retry.delay(attempt, resp), stop)
+
+    def _record_latency(self, seconds):
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_EWMA_ALPHA * (seconds - self.latency)
+
+    def close(self):
+        self.session.close()
+
+_default_transport = None
+
+def get_transport():
+    """
+    Returns the process-wide transport, creating it on first use.
+    """
+    global _default_transport
+    if _default_transport is None:
+        _default_transport = AniListTransport()
+    return _default_transport
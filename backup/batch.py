@@ -0,0 +1,179 @@
+"""
+backup/batch.py
+
+Non-interactive batch backups for many accounts in one process:
+- Reads a JSON config listing the accounts (or backs up every saved account).
+- Private exports use the tokens saved by anilist/auth.py.
+- All accounts share one worker pool and, through the shared transport, one
+  rate limiter, so the whole fleet runs at the full AniList budget without
+  separate processes competing for it.
+- Each backup is written with the usual get_output_path naming in output/.
+
+Config example (every per-account key is optional and falls back to the top level):
+    {
+        "types": ["ANIME", "MANGA"],
+        "format": "compact",
+        "compression": "gzip",
+        "overwrite": true,
+        "workers": 8,
+        "accounts": [
+            "SomeUser",
+            {"username": "OtherUser", "private": false, "types": ["ANIME"], "statuses": ["COMPLETED"]},
+            {"username": "ThirdUser", "filter": "score>=8 completed>=2022"}
+        ]
+    }
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ui.prompts import print_info, print_success, print_error
+from ui.colors import print_boxed_safe
+from anilist.api import get_user_id, get_viewer_info
+from anilist.jsoncodec import load
+from anilist.auth import get_saved_token, list_saved_accounts
+from anilist.transport import DEFAULT_POOL_SIZE
+from backup.output import BACKUP_FORMATS, COMPRESSION_EXTENSIONS, available_compressions, ensure_output_dir
+from anilist.formatter import compile_filter, FilterError
+from backup.exporter import stream_full_backup
+
+MEDIA_TYPES = ("ANIME", "MANGA")
+DEFAULT_BATCH_WORKERS = DEFAULT_POOL_SIZE  # one pooled connection per download
+
+class BatchConfigError(Exception):
+    pass
+
+def _option(account, config, key, default=None):
+    return account.get(key, config.get(key, default))
+
+def load_batch_config(path):
+    """
+    Reads and validates a batch config. Returns (config, accounts) where accounts
+    is a list of dicts with at least "username".
+    Raises BatchConfigError on invalid configs.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = load(f)
+    except (OSError, ValueError) as e:
+        raise BatchConfigError(f"Cannot read batch config '{path}': {e}")
+    if not isinstance(config, dict):
+        raise BatchConfigError("Batch config must be a JSON object.")
+    accounts = config.get("accounts")
+    if accounts is None:
+        accounts = list_saved_accounts()
+    accounts = [{"username": a} if isinstance(a, str) else a for a in accounts]
+    if not accounts:
+        raise BatchConfigError("No accounts to back up (none listed and none saved).")
+    for account in accounts:
+        if not isinstance(account, dict) or not account.get("username"):
+            raise BatchConfigError(f"Invalid account entry: {account!r}")
+        types = _option(account, config, "types", list(MEDIA_TYPES))
+        if not types or any(t not in MEDIA_TYPES for t in types):
+            raise BatchConfigError(f"Invalid types for {account['username']}: {types!r}")
+        if _option(account, config, "format", "pretty") not in BACKUP_FORMATS:
+            raise BatchConfigError(f"Unknown format for {account['username']}.")
+        compression = _option(account, config, "compression")
+        if compression and compression not in COMPRESSION_EXTENSIONS:
+            raise BatchConfigError(f"Unknown compression for {account['username']}: {compression}")
+        if compression and compression not in available_compressions():
+            raise BatchConfigError(f"Compression '{compression}' is not available (missing package?).")
+        try:
+            compile_filter(expression=_option(account, config, "filter"))
+        except FilterError as e:
+            raise BatchConfigError(f"Invalid filter for {account['username']}: {e}")
+    return config, accounts
+
+def _resolve_account(account, config):
+    """
+    Returns (user_id, auth_token) for an account; auth_token is None for public exports.
+    """
+    username = account["username"]
+    private = _option(account, config, "private")
+    token = get_saved_token(username) if private is not False else None
+    if private and not token:
+        raise BatchConfigError(f"No saved token for '{username}'; add the account once interactively.")
+    if not token:
+        return get_user_id(username), None
+    viewer_info = get_viewer_info(token)
+    if not viewer_info:
+        raise BatchConfigError(f"Saved token for '{username}' was rejected by AniList.")
+    if viewer_info["username"] != username:
+        raise BatchConfigError(f"Saved token for '{username}' belongs to '{viewer_info['username']}'.")
+    return viewer_info["id"], token
+
+def _backup_account(account, config, executor):
+    user_id, auth_token = _resolve_account(account, config)
+    types = _option(account, config, "types", list(MEDIA_TYPES))
+    tasks = [t for t in MEDIA_TYPES if t in types]
+    return stream_full_backup(
+        user_id,
+        account["username"],
+        tasks,
+        auth_token,
+        _option(account, config, "statuses"),
+        _option(account, config, "title"),
+        _option(account, config, "format", "pretty"),
+        _option(account, config, "compression"),
+        executor=executor,
+        overwrite=_option(account, config, "overwrite", True),
+        show_progress=False,
+        expression=_option(account, config, "filter")
+    )
+
+def run_batch(config, accounts):
+    """
+    Backs up every account. Downloads for all accounts are scheduled on one pool
+    of `workers` threads; each account's writer runs on its own thread, at most
+    `workers` at a time, so downloads never wait on an idle writer.
+    Returns {username: exported counts or the error message}.
+    """
+    ensure_output_dir()
+    workers = max(1, int(config.get("workers", DEFAULT_BATCH_WORKERS)))
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aniport-fetch") as fetch_pool, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aniport-account") as account_pool:
+        futures = {
+            account_pool.submit(_backup_account, account, config, fetch_pool): account["username"]
+            for account in accounts
+        }
+        for future in as_completed(futures):
+            username = futures[future]
+            try:
+                results[username] = future.result()
+            except Exception as e:
+                results[username] = str(e)
+                print_error(f"Backup of {username} failed: {e}")
+    return results
+
+def batch_workflow(config_path):
+    """
+    Entry point for `python main.py batch CONFIG`. Returns True if every account was backed up.
+    """
+    try:
+        config, accounts = load_batch_config(config_path)
+    except BatchConfigError as e:
+        print_error(str(e))
+        return False
+    print_info(f"Backing up {len(accounts)} accounts...")
+    start = time.time()
+    results = run_batch(config, accounts)
+    elapsed = time.time() - start
+
+    lines = []
+    ok = 0
+    for account in accounts:
+        username = account["username"]
+        result = results.get(username)
+        if isinstance(result, dict) and result:
+            ok += 1
+            counts = ", ".join(f"{n} {key}" for key, n in result.items())
+            lines.append(f"  {username}: {counts}")
+        else:
+            lines.append(f"  {username}: FAILED ({result or 'nothing exported'})")
+    print_boxed_safe(
+        "Batch stats:\n" + "\n".join(lines) + f"\n  Accounts backed up: {ok} / {len(accounts)}\n  Time: {elapsed:.1f} sec",
+        "CYAN", 60
+    )
+    if ok == len(accounts):
+        print_success("All accounts backed up!")
+    return ok == len(accounts)
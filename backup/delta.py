@@ -0,0 +1,164 @@
+"""
+backup/delta.py
+
+Incremental (delta) backups chained to a base snapshot:
+- A delta file records only added, changed and removed entries since its base,
+  plus the base file name and its SHA-256 fingerprint.
+- Bases may themselves be deltas, forming a chain back to a full backup.
+- Chains are resolved transparently on load (so restore accepts them directly)
+  and can be compacted back into a single full snapshot.
+"""
+
+import os
+import hashlib
+from datetime import datetime, timezone
+from ui.prompts import prompt_boxed, print_info, print_success, print_error
+
+DELTA_FORMAT_VERSION = 1
+MEDIA_KEYS = ("anime", "manga")
+
+class DeltaChainError(Exception):
+    pass
+
+def is_delta_backup(data):
+    return isinstance(data, dict) and "aniport_delta" in data
+
+def file_fingerprint(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def get_delta_output_path(output_dir, username, media_type):
+    # e.g., output/AniXWeebs_anime_delta_20250101-030000.json
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    return os.path.join(output_dir, f"{username}_{media_type}_delta_{stamp}.json")
+
+def as_typed_lists(data):
+    """
+    Normalizes a full backup (dict or legacy list format) into {"anime": [...], "manga": [...]},
+    keeping only the keys that have entries or were present in the backup.
+    """
+    typed = {}
+    if isinstance(data, dict):
+        for key in MEDIA_KEYS:
+            if key in data:
+                typed[key] = list(data[key])
+    elif isinstance(data, list):
+        for e in data:
+            mtype = e.get("media", {}).get("type") or "ANIME"
+            typed.setdefault(mtype.lower(), []).append(e)
+    return typed
+
+def _entry_changed(old, new):
+    if old.get("updatedAt") is not None and new.get("updatedAt") is not None:
+        return old["updatedAt"] != new["updatedAt"]
+    # Backups made before updatedAt was exported: fall back to a content comparison
+    return old != new
+
+def build_delta(base_data, current, base_name, base_fingerprint):
+    """
+    base_data: resolved full backup the delta is relative to.
+    current: {"anime": [...], "manga": [...]} freshly fetched (only the exported types).
+    Returns (delta, counts) where counts is {"added": n, "changed": n, "removed": n}.
+    """
+    base_typed = as_typed_lists(base_data)
+    delta = {
+        "aniport_delta": DELTA_FORMAT_VERSION,
+        "base": base_name,
+        "base_fingerprint": base_fingerprint,
+        "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    counts = {"added": 0, "changed": 0, "removed": 0}
+    for key, entries in current.items():
+        old_by_id = {e["media"]["id"]: e for e in base_typed.get(key, [])}
+        new_ids = set()
+        added, changed = [], []
+        for entry in entries:
+            mid = entry["media"]["id"]
+            new_ids.add(mid)
+            old = old_by_id.get(mid)
+            if old is None:
+                added.append(entry)
+            elif _entry_changed(old, entry):
+                changed.append(entry)
+        removed = [mid for mid in old_by_id if mid not in new_ids]
+        delta[key] = {"added": added, "changed": changed, "removed": removed}
+        counts["added"] += len(added)
+        counts["changed"] += len(changed)
+        counts["removed"] += len(removed)
+    return delta, counts
+
+def apply_delta(base_data, delta):
+    """
+    Applies one delta to a resolved full backup. Returns the new full backup in dict format.
+    """
+    typed = as_typed_lists(base_data)
+    for key in MEDIA_KEYS:
+        section = delta.get(key)
+        if not section:
+            continue
+        entries = typed.get(key, [])
+        removed = set(section.get("removed", []))
+        replacements = {e["media"]["id"]: e for e in section.get("changed", [])}
+        merged = []
+        for e in entries:
+            mid = e["media"]["id"]
+            if mid in removed:
+                continue
+            merged.append(replacements.pop(mid, e))
+        # Changed entries whose base copy is missing are kept rather than dropped
+        merged.extend(replacements.values())
+        merged.extend(section.get("added", []))
+        typed[key] = merged
+    return typed
+
+def resolve_backup_chain(path, data, read_json):
+    """
+    Follows a delta's base links back to a full backup and replays every delta on top.
+    read_json(path) must return the raw parsed JSON of a file.
+    Raises DeltaChainError if a base is missing, modified since the delta was made, or cyclic.
+    """
+    chain = []
+    seen = set()
+    while is_delta_backup(data):
+        real = os.path.realpath(path)
+        if real in seen:
+            raise DeltaChainError(f"Delta chain loops back to '{path}'.")
+        seen.add(real)
+        chain.append(data)
+        base_path = os.path.join(os.path.dirname(path) or ".", data["base"])
+        if not os.path.isfile(base_path):
+            raise DeltaChainError(f"Base backup '{base_path}' for delta '{path}' not found.")
+        if file_fingerprint(base_path) != data.get("base_fingerprint"):
+            raise DeltaChainError(f"Base backup '{base_path}' was modified after delta '{path}' was created.")
+        path = base_path
+        data = read_json(base_path)
+    for delta in reversed(chain):
+        data = apply_delta(data, delta)
+    return data
+
+def compact_workflow():
+    """
+    Folds a base+delta chain back into one full snapshot written next to the delta.
+    """
+    from backup.importer import select_backup_file
+    from backup.output import load_json_backup, save_json_backup, split_backup_ext
+
+    print_info("Select the newest delta backup of the chain you want to compact.")
+    path = select_backup_file(purpose="compact")
+    data = load_json_backup(path)
+    if data is None:
+        return
+    base, ext = split_backup_ext(path)
+    out_path = prompt_boxed(
+        "Where should the full snapshot be written?",
+        default=f"{base}.full{ext}",
+        color="CYAN"
+    )
+    if save_json_backup(data, out_path):
+        total = sum(len(v) for v in as_typed_lists(data).values())
+        print_success(f"Compacted chain into a full snapshot with {total} entries.")
+    else:
+        print_error("Compaction did not write a snapshot.")
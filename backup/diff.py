@@ -0,0 +1,97 @@
+"""
+backup/diff.py
+
+Field-level diff between backup entries and the target account's current list:
+- Compares status, score, progress, progressVolumes, dates, notes, private and
+  custom-list membership.
+- Produces minimal patch entries carrying only the changed fields, so a re-sync
+  sends one mutation per entry that actually differs.
+- Entries missing on the target are sent whole.
+"""
+
+DIFF_FIELDS = [
+    "status",
+    "score",
+    "progress",
+    "progressVolumes",
+    "startedAt",
+    "completedAt",
+    "notes",
+    "private",
+    "customLists",
+]
+
+EMPTY_DATE = {"year": None, "month": None, "day": None}
+
+def normalize_field(field, value):
+    if field in ("startedAt", "completedAt"):
+        value = value or {}
+        return {k: value.get(k) for k in EMPTY_DATE}
+    if field == "score":
+        return float(value or 0)
+    if field in ("progress", "progressVolumes"):
+        return value or 0
+    if field == "notes":
+        return value or ""
+    if field == "private":
+        return bool(value)
+    if field == "customLists":
+        return sorted(value or [])
+    return value
+
+def diff_entry(backup_entry, current_entry):
+    """
+    Returns a dict of {field: backup value} for every compared field present in
+    backup_entry whose value differs from current_entry. Values are normalized,
+    so None/""/0 style differences don't count as changes.
+    """
+    changes = {}
+    for field in DIFF_FIELDS:
+        if field not in backup_entry:
+            continue
+        wanted = normalize_field(field, backup_entry.get(field))
+        if wanted != normalize_field(field, current_entry.get(field)):
+            changes[field] = wanted
+    return changes
+
+def make_patch_entry(backup_entry, changes):
+    """
+    Builds an entry that restores only `changes`, keeping the media block so it
+    can still be verified, saved to .failed/.leftout files and retried.
+    """
+    patch = {"media": backup_entry["media"]}
+    patch.update(changes)
+    return patch
+
+def plan_differential_restore(entries, current_by_type):
+    """
+    entries: list of (media_type, entry) from the backup.
+    current_by_type: {"ANIME": {media_id: entry}, "MANGA": {...}} for the target.
+    Returns (to_import, unchanged, stats) where to_import holds (media_type, entry)
+    pairs to send (full entries for new media, patch entries for changed ones),
+    and stats counts {"new": ..., "changed": ..., "unchanged": ..., "duplicate": ...}.
+    Repeated media ids (older backups stored one copy per custom list) are sent once.
+    """
+    to_import = []
+    unchanged = []
+    stats = {"new": 0, "changed": 0, "unchanged": 0, "duplicate": 0}
+    seen = set()
+    for media_type, entry in entries:
+        key = (media_type, entry["media"]["id"])
+        if key in seen:
+            stats["duplicate"] += 1
+            continue
+        seen.add(key)
+        current = current_by_type.get(media_type, {}).get(entry["media"]["id"])
+        if current is None:
+            to_import.append((media_type, entry))
+            stats["new"] += 1
+            continue
+        changes = diff_entry(entry, current)
+        if changes:
+            to_import.append((media_type, make_patch_entry(entry, changes)))
+            stats["changed"] += 1
+        else:
+            unchanged.append((media_type, entry))
+            stats["unchanged"] += 1
+    return to_import, unchanged, stats
@@ -2,24 +2,199 @@
 backup/exporter.py
 
 Coordinates the export (backup) workflow:
-- Prompts for username, privacy, (optionally) filters.
+- Prompts for username, privacy, (optionally) filters, including advanced filter expressions.
 - Handles OAuth if private entries needed.
 - Supports saved accounts/tokens for quick private export.
-- Fetches list(s), applies filters, saves as JSON in output/.
+- Resolves the user once, downloads anime and manga concurrently and streams them
+  page by page straight into the backup file in output/.
 - Shows progress and summary.
 - Now shows detailed stats (exported/skipped, time taken, responsive output).
 - Verifies username/account match for private export, with prompt to regenerate or continue.
+- Optional delta mode: writes only added/changed/removed entries relative to a previous backup.
 """
 
+import os
 import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from ui.prompts import (
     prompt_boxed, print_info, print_success, print_error,
-    confirm_boxed, menu_boxed, print_progress_bar
+    confirm_boxed, menu_boxed, print_progress_bar, PageProgress
 )
-from anilist.api import get_user_id, fetch_list, get_viewer_info
+from anilist.api import get_user_id, iter_list_pages, get_viewer_info
+from anilist.formatter import filter_entries, compile_filter, parse_filter_expression, FilterError
 from anilist.auth import interactive_oauth, get_saved_token, list_saved_accounts, save_account_token
-from backup.output import get_output_path, save_json_backup, ensure_output_dir
-from ui.helptext import USERNAME_HELP, EXPORT_PRIVACY_HELP, EXPORT_STATUS_HELP, EXPORT_TITLE_HELP, EXPORT_TYPE_HELP
+from backup.output import (
+    get_output_path, save_json_backup, ensure_output_dir, load_json_backup, OUTPUT_DIR,
+    BackupWriter, BACKUP_FORMATS, confirm_overwrite, available_compressions
+)
+from backup.delta import build_delta, file_fingerprint, get_delta_output_path
+from ui.helptext import (
+    USERNAME_HELP, EXPORT_PRIVACY_HELP, EXPORT_STATUS_HELP, EXPORT_TITLE_HELP, EXPORT_TYPE_HELP,
+    EXPORT_MODE_HELP, EXPORT_FORMAT_HELP, EXPORT_COMPRESSION_HELP, FILTER_EXPRESSION_HELP
+)
+
+_FETCH_DONE = object()
+PREFETCH_PAGES = 2  # pages buffered per list; bounds memory while the other list is being written
+PREFETCH_PUT_TIMEOUT = 0.5  # seconds between cancel checks while the buffer is full
+
+class ListPrefetch:
+    """
+    Downloads one media list on a worker thread while the caller consumes it.
+    entries() yields filtered entries as soon as their page has arrived, so writing
+    one list overlaps with downloading the other. Download errors are re-raised
+    in the consuming thread; cancel() stops the download at the next page.
+    At most PREFETCH_PAGES pages wait in memory: the download pauses until the
+    consumer catches up, so a list being prefetched never piles up in full.
+    """
+
+    def __init__(self, executor, user_id, media_type, auth_token=None, statuses=None, title_sub=None, expression=None):
+        self.media_type = media_type
+        spec = parse_filter_expression(expression) if expression else {}
+        self.predicate = compile_filter(spec, statuses=statuses, title=title_sub)
+        self.pages = queue.Queue(maxsize=PREFETCH_PAGES)
+        self.stopped = threading.Event()
+        if spec.get("status"):
+            # Push the expression's statuses to AniList too, so skipped lists are never downloaded
+            statuses = sorted(set(statuses) & spec["status"] if statuses else spec["status"])
+            if not statuses:
+                # The status filter and the expression share no status: nothing can match
+                self.statuses = []
+                self.pages.put(_FETCH_DONE)
+                return
+        self.statuses = statuses
+        executor.submit(self._produce, user_id, auth_token)
+
+    def _put(self, item):
+        # Blocks while the buffer is full, but gives up once cancel() was called
+        while not self.stopped.is_set():
+            try:
+                self.pages.put(item, timeout=PREFETCH_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self, user_id, auth_token):
+        try:
+            pages = iter_list_pages(user_id, self.media_type, auth_token=auth_token, statuses=self.statuses)
+            for page in pages:
+                if not self._put(page):
+                    return
+        except BaseException as e:
+            self._put(e)
+        else:
+            self._put(_FETCH_DONE)
+
+    def entries(self, on_page=None):
+        page_number = 0
+        while True:
+            page = self.pages.get()
+            if page is _FETCH_DONE:
+                return
+            if isinstance(page, BaseException):
+                raise page
+            page_number += 1
+            if on_page:
+                on_page(page_number, len(page))
+            # Statuses were already applied by AniList (status_in)
+            yield from filter_entries(page, predicate=self.predicate)
+
+    def cancel(self):
+        self.stopped.set()
+
+def prompt_filter_expression():
+    """
+    Asks for a filter expression until it parses. Returns the expression, or None if left empty.
+    """
+    while True:
+        expression = prompt_boxed(
+            "Enter a filter expression (e.g. score>=8 completed>=2022 list=Favourites):",
+            color="YELLOW",
+            helpmsg=FILTER_EXPRESSION_HELP
+        ).strip()
+        if not expression:
+            return None
+        try:
+            compile_filter(expression=expression)
+            return expression
+        except FilterError as e:
+            print_error(str(e))
+
+def start_list_fetches(executor, user_id, tasks, auth_token, statuses=None, title_sub=None, expression=None):
+    return {
+        media_type: ListPrefetch(executor, user_id, media_type, auth_token, statuses, title_sub, expression)
+        for media_type in tasks
+    }
+
+def stream_full_backup(
+    user_id,
+    username,
+    tasks,
+    auth_token,
+    statuses,
+    title_sub,
+    fmt,
+    compression=None,
+    executor=None,
+    overwrite=False,
+    show_progress=True,
+    expression=None
+):
+    """
+    Downloads every requested media type concurrently and streams the entries straight
+    into one backup file (a list for a single type, {"anime": [...], "manga": [...]} for both).
+    - executor: pool to download on (shared by the batch runner); a private one is used if omitted.
+    - overwrite: replace an existing file without asking.
+    - show_progress: per-page progress bars (off when several backups run at once).
+    - expression: filter expression (see anilist/formatter.py) applied on top of statuses/title_sub.
+    Returns {"anime": count, "manga": count} for the types written.
+    """
+    label = "both" if len(tasks) == 2 else tasks[0].lower()
+    filename = get_output_path(username, label, fmt, compression)
+    if not confirm_overwrite(filename, overwrite):
+        return {}
+    exported = {}
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=len(tasks))
+    writer = BackupWriter(filename, fmt=fmt, layout="dict" if len(tasks) == 2 else "list")
+    fetches = start_list_fetches(executor, user_id, tasks, auth_token, statuses, title_sub, expression)
+    try:
+        for media_type in tasks:
+            try:
+                progress = PageProgress(f"Fetching {media_type.lower()}") if show_progress else None
+                entries = fetches[media_type].entries(on_page=progress)
+                try:
+                    if len(tasks) == 2:
+                        count = writer.write_section(media_type.lower(), entries)
+                    else:
+                        count = writer.write_entries(entries)
+                finally:
+                    if progress:
+                        progress.close()
+                if not count:
+                    print_error(f"No {media_type.lower()} entries found for {username}.")
+                    continue
+                exported[media_type.lower()] = count
+            except Exception as e:
+                fetches[media_type].cancel()  # don't leave its download blocked on a full buffer
+                print_error(f"Error exporting {media_type.lower()} for {username}: {e}")
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        for fetch in fetches.values():
+            fetch.cancel()
+        if own_executor:
+            executor.shutdown()
+    if exported:
+        writer.close()
+        print_success(f"Backup saved to {filename}")
+    else:
+        writer.abort()
+    return exported
 
 def export_workflow():
     ensure_output_dir()
@@ -111,8 +286,40 @@ def export_workflow():
         helpmsg=EXPORT_TYPE_HELP
     )
 
-    # Filters
-    filter_status = prompt_boxed(
+    # Full snapshot or delta against a previous backup
+    mode = menu_boxed(
+        "What kind of backup would you like?",
+        ["Full backup", "Delta backup (only changes since a previous backup)"],
+        helpmsg=EXPORT_MODE_HELP
+    )
+    base_path = None
+    base_data = None
+    fmt = "pretty"
+    compression = None
+    if mode == 1:
+        fmt_choice = menu_boxed(
+            "Which file format would you like?",
+            ["Pretty JSON (readable)", "Compact JSON (smaller)", "NDJSON (one entry per line)"],
+            helpmsg=EXPORT_FORMAT_HELP
+        )
+        fmt = BACKUP_FORMATS[fmt_choice - 1]
+        compressions = available_compressions()
+        comp_choice = menu_boxed(
+            "Compress the backup file?",
+            ["No compression"] + [f"Yes, {name}" for name in compressions],
+            helpmsg=EXPORT_COMPRESSION_HELP
+        )
+        compression = compressions[comp_choice - 2] if comp_choice > 1 else None
+    else:
+        from backup.importer import select_backup_file
+        base_path = select_backup_file(purpose="use as the delta base")
+        base_data = load_json_backup(base_path)
+        if base_data is None:
+            print_error("Could not load the base backup. Aborting export.")
+            return
+
+    # Filters (a delta must cover the same entries as its base, so filters are skipped)
+    filter_status = base_path is None and prompt_boxed(
         "Would you like to filter by status? (y/N)", default="N", color="YELLOW"
     ).lower() == "y"
     statuses = None
@@ -141,7 +348,7 @@ def export_workflow():
             print_error("No valid statuses selected. Proceeding with no status filter.")
             statuses = None
 
-    filter_title = prompt_boxed(
+    filter_title = base_path is None and prompt_boxed(
         "Would you like to filter by title substring? (y/N)", default="N", color="YELLOW"
     ).lower() == "y"
     title_sub = None
@@ -152,6 +359,13 @@ def export_workflow():
             helpmsg=EXPORT_TITLE_HELP
         )
 
+    expression = None
+    if base_path is None and prompt_boxed(
+        "Would you like to use an advanced filter (score, progress, dates, custom lists...)? (y/N)",
+        default="N", color="YELLOW"
+    ).lower() == "y":
+        expression = prompt_filter_expression()
+
     # Export anime/manga
     tasks = []
     if exptype in (1, 3):
@@ -159,42 +373,56 @@ def export_workflow():
     if exptype in (2, 3):
         tasks.append("MANGA")
 
-    exported = {}
-    stats = {}
+    names = " and ".join(t.lower() for t in tasks)
+    print_info(f"Fetching your {names} list from AniList...")
     start = time.time()
-    for media_type in tasks:
-        print_info(f"Fetching {media_type.lower()} list from AniList...")
-        try:
-            user_id = get_user_id(username)
-            entries = fetch_list(
-                user_id, media_type,
-                auth_token=auth_token,
-                statuses=list(statuses) if statuses else None,
-                title_sub=title_sub
+    try:
+        user_id = get_user_id(username)
+    except Exception as e:
+        print_error(f"Error exporting: {e}")
+        return
+    if base_path:
+        exported = {}
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            fetches = start_list_fetches(executor, user_id, tasks, auth_token)
+            try:
+                for media_type in tasks:
+                    try:
+                        entries = list(fetches[media_type].entries())
+                        if not entries:
+                            print_error(f"No {media_type.lower()} entries found.")
+                            continue
+                        exported[media_type.lower()] = entries
+                    except Exception as e:
+                        print_error(f"Error exporting {media_type.lower()}: {e}")
+            finally:
+                for fetch in fetches.values():
+                    fetch.cancel()
+        if exported:
+            label = "both" if len(tasks) == 2 else tasks[0].lower()
+            delta, counts = build_delta(
+                base_data, exported,
+                os.path.relpath(base_path, OUTPUT_DIR),
+                file_fingerprint(base_path)
             )
-            total = len(entries)
-            stats[media_type] = {
-                "exported": total,
-                "filtered": "filtered"
-            }
-            if not entries:
-                print_error(f"No {media_type.lower()} entries found.")
-                continue
-            filename = get_output_path(username, media_type.lower())
-            exported[media_type.lower()] = entries
-            if len(tasks) == 1:
-                save_json_backup(entries, filename)
+            print_info(
+                f"Changes since base: {counts['added']} added, {counts['changed']} changed, {counts['removed']} removed."
+            )
+            if not any(counts.values()):
+                print_success("Nothing changed since the base backup. No delta file written.")
             else:
-                continue
-        except Exception as e:
-            print_error(f"Error exporting {media_type.lower()}: {e}")
-    if len(tasks) == 2 and exported:
-        filename = get_output_path(username, "both")
-        save_json_backup(exported, filename)
+                save_json_backup(delta, get_delta_output_path(OUTPUT_DIR, username, label))
+        exported_counts = {k: len(v) for k, v in exported.items()}
+    else:
+        exported_counts = stream_full_backup(
+            user_id, username, tasks, auth_token,
+            list(statuses) if statuses else None, title_sub, fmt, compression,
+            expression=expression
+        )
 
     elapsed = time.time() - start
     print_success("Export complete! Your backup(s) are in the output/ folder.")
     print_info("Export stats:")
-    for k in exported:
-        print_info(f"  {k.title()} exported: {len(exported[k])}")
-    print_info(f"  Time taken: {elapsed:.1f} sec")
\ No newline at end of file
+    for k in exported_counts:
+        print_info(f"  {k.title()} exported: {exported_counts[k]}")
+    print_info(f"  Time taken: {elapsed:.1f} sec")
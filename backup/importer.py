@@ -4,14 +4,23 @@ backup/importer.py
 Coordinates the restore (import) workflow with multi-account support:
 - Lets user select or add AniList accounts (token+username remembered).
 - Looks for JSON backups in output/, helps user select or enter a path.
-- Reads and validates backup JSON.
-- Restores entries using SaveMediaListEntry (with rate limit handling and progress bar).
-- Skips already-present entries and notifies user.
+- Reads and validates backup JSON in a single streaming pass.
+- Restores entries using batched SaveMediaListEntry mutations, several in flight at once
+  (with rate limit handling and progress bar).
+- Diffs the backup against the target list field by field; only new or changed
+  entries are sent, and changed ones only carry the fields that differ.
 - Shows summary and friendly UI.
 - Writes failed entries to a separate failed restore file if any.
 - Shows detailed stats (total, restored, skipped, failed, time taken).
 - Robust verification and account checking using token.
-- Explicit verification: checks that each imported entry is present in the user's AniList, regardless of total list size.
+- Verification straight from the mutation responses (see backup/verify.py): no fixed
+  wait and no list re-download, with an optional targeted re-check of unconfirmed entries.
+- Optional field-level verification with a per-entry mismatch report (.mismatches.json).
+- Write-ahead restore journal (.journal, see backup/journal.py): every finished entry is
+  recorded as it completes, and an interrupted or crashed restore resumes from it
+  (prompted, or directly with `python main.py import --resume`).
+- Optional partial restore: a filter expression (see anilist/formatter.py) picks the slice
+  of the backup to restore.
 """
 
 import os
@@ -20,15 +29,24 @@ import sys
 from datetime import datetime, timezone
 from ui.prompts import (
     prompt_boxed, print_info, print_success, print_error,
-    confirm_boxed, menu_boxed, print_progress_bar, print_warning
+    confirm_boxed, menu_boxed, print_progress_bar, print_warning, PageProgress
 )
 from ui.colors import boxed_text, print_boxed_safe
 from backup.output import (
-    load_json_backup, validate_backup_json, OUTPUT_DIR, save_json_backup,
-    get_leftout_restore_path
+    OUTPUT_DIR, save_json_backup, get_leftout_restore_path, is_backup_filename, split_backup_ext
 )
+from backup.loader import load_backup_entries, InvalidBackup
 from anilist.auth import choose_account_flow
-from anilist.api import restore_entry, get_viewer_info, fetch_list
+from anilist.api import get_viewer_info, iter_list
+from backup.diff import plan_differential_restore
+from backup.restore_engine import run_concurrent_restore, RestoreEstimator, DEFAULT_RESTORE_CONCURRENCY
+from backup.journal import get_journal_path, read_journal, RestoreJournal
+from backup.delta import file_fingerprint
+from backup.exporter import prompt_filter_expression
+from anilist.formatter import compile_filter
+from backup.verify import (
+    RestoreReplica, verify_against_replica, recheck_entries, verify_fields, write_mismatch_report
+)
 from ui.helptext import IMPORT_FILE_HELP
 
 def get_current_utc():
@@ -39,52 +57,11 @@ def get_user_login():
     """Get current user's login"""
     return os.getenv('USER', os.getenv('USERNAME', 'unknown'))
 
-def calculate_dynamic_eta(entries_count, sample_entries=10, sample_timeout=30):
-    """Calculate ETA based on actual import speed and rate limits"""
-    print_info("Calculating import speed (this will take a moment)...")
-    
-    rate_limit_every = 35  # Number of entries before rate limit
-    rate_limit_pause = 60  # seconds
-    
-    # Test import speed with a small sample
-    sample_size = min(sample_entries, entries_count)
-    sample_start = time.time()
-    rate_limits_hit = 0
-    entries_processed = 0
-    
-    for i in range(sample_size):
-        tick_start = time.time()
-        # Simulated entry processing time
-        time.sleep(0.5)  # Base processing time
-        entries_processed += 1
-        
-        # Check if we hit a rate limit
-        if entries_processed >= rate_limit_every:
-            rate_limits_hit += 1
-            entries_processed = 0
-            time.sleep(1)  # Simulate mini-pause
-        
-        if time.time() - sample_start > sample_timeout:
-            break
-    
-    sample_time = time.time() - sample_start
-    
-    # Calculate averages
-    avg_entry_time = sample_time / sample_size
-    expected_rate_limits = entries_count // rate_limit_every
-    total_rate_limit_time = expected_rate_limits * rate_limit_pause
-    
-    # Calculate total ETA
-    base_time = entries_count * avg_entry_time
-    total_eta = base_time + total_rate_limit_time
-    
-    return total_eta, avg_entry_time, expected_rate_limits
-
-def select_backup_file():
+def select_backup_file(purpose="import"):
     candidates = []
     if os.path.isdir(OUTPUT_DIR):
         for f in os.listdir(OUTPUT_DIR):
-            if f.lower().endswith(".json"):
+            if is_backup_filename(f):
                 candidates.append(f)
     candidates.sort()
     if len(candidates) == 1:
@@ -102,7 +79,7 @@ def select_backup_file():
     elif len(candidates) > 1:
         menu_msg = (
             "Multiple backup files found in 'output/'.\n"
-            "Select which one to import, or choose 'Other...' to enter a custom path.\n"
+            f"Select which one to {purpose}, or choose 'Other...' to enter a custom path.\n"
             "Tip: In Termux/Linux, open a new session and use 'ls output', 'realpath', or a file manager to find your files and their full paths."
         )
         options = [f for f in candidates] + ["Other..."]
@@ -128,73 +105,53 @@ def select_backup_file():
         if path:
             return path
 
+def get_mismatch_report_path(orig_path):
+    dirname, filename = os.path.split(orig_path)
+    base, _ = split_backup_ext(filename)
+    return os.path.join(dirname or ".", f"{base}.mismatches.json")
+
 def get_failed_restore_path(orig_path):
     dirname, filename = os.path.split(orig_path)
-    base, ext = os.path.splitext(filename)
+    base, ext = split_backup_ext(filename)
     failed_name = f"{base}.failed{ext}"
     return os.path.join(dirname or ".", failed_name)
 
-def get_entries_from_backup(backup_data):
-    entries = []
-    if isinstance(backup_data, dict) and ("anime" in backup_data or "manga" in backup_data):
-        if "anime" in backup_data:
-            entries.extend((("ANIME", e) for e in backup_data["anime"]))
-        if "manga" in backup_data:
-            entries.extend((("MANGA", e) for e in backup_data["manga"]))
-    elif isinstance(backup_data, list):
-        for e in backup_data:
-            mtype = e.get("media", {}).get("type", None)
-            if mtype in ("ANIME", "MANGA"):
-                entries.append((mtype, e))
-            else:
-                entries.append(("ANIME", e))
-    return entries
-
-def get_entry_types_in_backup(backup_data):
-    types = set()
-    entries = get_entries_from_backup(backup_data)
-    for media_type, _ in entries:
-        types.add(media_type)
-    return types
-
-def verify_restored_entries(entries, auth_token):
-    result = {}
-    viewer_info = get_viewer_info(auth_token)
-    if not viewer_info:
-        print_error("Failed to fetch account info for verification.")
-        return result
-    user_id = viewer_info["id"]
-    type_map = {"ANIME": [], "MANGA": []}
-    for (media_type, entry) in entries:
-        type_map[media_type].append(entry)
-    for media_type in ["ANIME", "MANGA"]:
-        imported_entries = type_map[media_type]
-        if not imported_entries:
-            continue
-        current_entries = fetch_list(user_id, media_type, auth_token=auth_token)
-        current_ids = set(e["media"]["id"] for e in current_entries)
-        imported_ids = set(e["media"]["id"] for e in imported_entries)
-        present = sum(1 for eid in imported_ids if eid in current_ids)
-        total = len(imported_ids)
-        result[media_type] = (present, total)
-    return result
-
-def save_failed_entries(failed_entries, backup_data, failed_path):
-    if isinstance(backup_data, dict) and ("anime" in backup_data or "manga" in backup_data):
+def read_backup(filepath):
+    """
+    Loads a backup in a single pass.
+    Returns (entries, layout, types) or None after explaining what went wrong.
+    """
+    if not os.path.isfile(filepath):
+        print_error(f"File '{filepath}' not found.")
+        return None
+    try:
+        entries, layout, types, _ = load_backup_entries(filepath)
+    except InvalidBackup:
+        print_error("This backup file is not valid or is from an unsupported format.")
+        return None
+    except Exception as e:
+        print_error(f"Failed to load JSON backup: {e}")
+        return None
+    return entries, layout, types
+
+def save_failed_entries(failed_entries, layout, failed_path):
+    if layout == "dict":
         failed_dict = {"anime": [], "manga": []}
         for item in failed_entries:
             mt = item["media_type"].lower()
             if mt in failed_dict:
                 failed_dict[mt].append(item["entry"])
-        save_json_backup(failed_dict, failed_path, overwrite=True)
+        saved = save_json_backup(failed_dict, failed_path, overwrite=True)
     else:
         failed_list = [item["entry"] for item in failed_entries]
-        save_json_backup(failed_list, failed_path, overwrite=True)
-    print_error(f"Failed entries saved to: {failed_path}")
-    print_info("You can retry importing this file later.")
-
-def save_leftout_entries(leftout_entries, backup_data, leftout_path):
-    if isinstance(backup_data, dict) and ("anime" in backup_data or "manga" in backup_data):
+        saved = save_json_backup(failed_list, failed_path, overwrite=True)
+    if saved:
+        print_error(f"Failed entries saved to: {failed_path}")
+        print_info("You can retry importing this file later.")
+    return saved
+
+def save_leftout_entries(leftout_entries, layout, leftout_path):
+    if layout == "dict":
         leftout_dict = {"anime": [], "manga": []}
         for item in leftout_entries:
             mt = item[0].lower()
@@ -207,26 +164,6 @@ def save_leftout_entries(leftout_entries, backup_data, leftout_path):
     print_error(f"Unimported entries saved to: {leftout_path}")
     print_info("You can retry importing this file later.")
 
-def spinner_progress_bar(task_message="Verifying restored entries in AniList...", seconds=15):
-    import itertools
-    import sys
-    import time
-
-    spinner = itertools.cycle(["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"])
-    bar_len = 28
-    print_boxed_safe(task_message, "CYAN", 60)  # Print message ONCE
-
-    for i in range(bar_len + 1):
-        spin = next(spinner)
-        bar = "█" * i + "-" * (bar_len - i)
-        sys.stdout.write(f"\r{spin} [{bar}] {int(i/bar_len*100):3d}%")
-        sys.stdout.flush()
-        time.sleep(seconds / bar_len)
-    # Clear bar after complete
-    sys.stdout.write("\r" + " " * (bar_len + 14) + "\r")
-    sys.stdout.flush()
-    print_boxed_safe("Verification complete!", "CYAN", 60)
-
 def print_post_verification_note():
     link = "https://anilist.co/settings/list"
     note = (
@@ -242,51 +179,180 @@ def print_post_verification_note():
     )
     print_boxed_safe(note, "CYAN", 60)
 
-def filter_entries_already_present(entries, auth_token):
+def diff_entries_against_current(entries, auth_token):
+    """
+    Compares each backup entry field by field with the target account's current list.
+    Returns (to_import, unchanged, stats, replica); changed entries are reduced to patches
+    holding only the fields that differ, and replica is seeded with the lists just read.
+    """
     viewer_info = get_viewer_info(auth_token)
     user_id = viewer_info["id"]
-    # Fetch current anime/manga entries
-    anime_present_ids = set()
-    manga_present_ids = set()
-    anime_entries = []
-    manga_entries = []
-    for (media_type, entry) in entries:
-        if media_type == "ANIME":
-            anime_entries.append(entry)
-        elif media_type == "MANGA":
-            manga_entries.append(entry)
-    if anime_entries:
-        current_anime = fetch_list(user_id, "ANIME", auth_token=auth_token)
-        anime_present_ids = set(e["media"]["id"] for e in current_anime)
-    if manga_entries:
-        current_manga = fetch_list(user_id, "MANGA", auth_token=auth_token)
-        manga_present_ids = set(e["media"]["id"] for e in current_manga)
-    to_import = []
-    already_present = []
-    for (media_type, entry) in entries:
-        mid = entry["media"]["id"]
-        if media_type == "ANIME" and mid in anime_present_ids:
-            already_present.append((media_type, entry))
-        elif media_type == "MANGA" and mid in manga_present_ids:
-            already_present.append((media_type, entry))
+    current_by_type = {}
+    for media_type in ("ANIME", "MANGA"):
+        if any(mt == media_type for mt, _ in entries):
+            progress = PageProgress(f"Reading your current {media_type.lower()} list")
+            try:
+                current = iter_list(user_id, media_type, auth_token=auth_token, on_page=progress, profile="standard")
+                current_by_type[media_type] = {e["media"]["id"]: e for e in current}
+            finally:
+                progress.close()
+    to_import, unchanged, stats = plan_differential_restore(entries, current_by_type)
+    return to_import, unchanged, stats, RestoreReplica(current_by_type)
+
+def format_eta(seconds):
+    mins, secs = divmod(int(seconds), 60)
+    hours, mins = divmod(mins, 60)
+    if hours > 0:
+        return f"{hours:02d}:{mins:02d}:{secs:02d}"
+    return f"{mins:02d}:{secs:02d}"
+
+def restore_with_progress(entries, auth_token, desc, bar_format, replica, journal=None, concurrency=DEFAULT_RESTORE_CONCURRENCY):
+    """
+    Restores (media_type, entry) pairs with several batches in flight, advancing the
+    progress bar per entry and feeding every response into the replica (and the
+    journal, if given).
+    Returns (restored, failed_entries, leftout_entries, interrupted).
+    On Ctrl+C, leftout_entries holds every entry without a known outcome
+    (including those in flight when the interrupt arrived).
+    """
+    import tqdm
+
+    counts = {"restored": 0}
+    failed_entries = []
+    done = set()
+    progress_bar = tqdm.tqdm(
+        total=len(entries),
+        desc=desc,
+        unit="entries",
+        dynamic_ncols=True,
+        bar_format=bar_format
+    )
+    estimator = RestoreEstimator(concurrency=concurrency)
+    progress_bar.set_postfix_str(f"ETA {format_eta(estimator.estimate(len(entries)))}")
+
+    def on_result(index, media_type, entry, saved):
+        replica.apply(media_type, entry, saved)
+        if journal:
+            journal.record(media_type, entry, saved)
+        if saved:
+            counts["restored"] += 1
         else:
-            to_import.append((media_type, entry))
-    return to_import, already_present
+            failed_entries.append({"media_type": media_type, "entry": entry})
+        done.add(index)
+        progress_bar.set_postfix_str(f"ETA {format_eta(estimator.estimate(len(entries) - len(done)))}", refresh=False)
+        progress_bar.update(1)
+
+    interrupted = False
+    try:
+        run_concurrent_restore(entries, auth_token, on_result, concurrency=concurrency)
+    except KeyboardInterrupt:
+        interrupted = True
+    progress_bar.close()
+    leftout_entries = [item for i, item in enumerate(entries) if i not in done]
+    return counts["restored"], failed_entries, leftout_entries, interrupted
+
+def report_field_verification(entries, auth_token, filepath):
+    """
+    Checks every restored field on AniList and writes a per-entry mismatch report
+    next to the backup when anything differs.
+    """
+    try:
+        checked, mismatches = verify_fields(entries, auth_token)
+    except Exception as e:
+        print_error(f"Field check could not be completed: {e}")
+        return
+    if not mismatches:
+        print_boxed_safe(f"Field check PASSED: all {checked} entries match your backup field by field.", "GREEN", 60)
+        return
+    missing = sum(1 for m in mismatches if m["missing"])
+    print_boxed_safe(
+        f"Field check: {len(mismatches)} / {checked} entries differ from your backup "
+        f"({missing} missing, {len(mismatches) - missing} with different fields).",
+        "RED", 60
+    )
+    report_path = get_mismatch_report_path(filepath)
+    try:
+        write_mismatch_report(report_path, filepath, checked, mismatches)
+        print_info(f"Mismatch report saved to: {report_path}")
+    except Exception as e:
+        print_error(f"Failed to save mismatch report: {e}")
+
+def report_verification(entries, auth_token, replica, filepath):
+    """
+    Checks the restored entries against the replica, offers a targeted re-check
+    of the unconfirmed ones, and prints the results. Optionally follows up with
+    a field-level check.
+    Returns the number of entries that remain unconfirmed.
+    """
+    verify_result, unconfirmed = verify_against_replica(entries, replica)
+    if unconfirmed and confirm_boxed(f"Re-check the {len(unconfirmed)} unconfirmed entries on AniList?"):
+        try:
+            recheck_entries(unconfirmed, auth_token, replica)
+        except Exception as e:
+            print_error(f"Re-check could not be completed: {e}")
+        verify_result, unconfirmed = verify_against_replica(entries, replica)
+
+    for mt in sorted(verify_result):
+        confirmed, total = verify_result[mt]
+        print_boxed_safe(f"Verification: {confirmed} / {total} imported entries confirmed by AniList ({mt}).", "CYAN", 60)
+        if confirmed != total:
+            print_boxed_safe(f"{total - confirmed} entries could not be confirmed after restore ({mt}).", "RED", 60)
+
+    print_post_verification_note()
+
+    if not unconfirmed:
+        print_boxed_safe("Verification PASSED: All imported entries are present in your AniList!", "GREEN", 60)
+    else:
+        print_boxed_safe("Verification FAILED: Some imported entries are missing from your AniList.", "RED", 60)
+        print_boxed_safe(f"Total failed verification entries: {len(unconfirmed)}", "RED", 60)
+
+    if confirm_boxed("Also check status, score, progress and dates field by field?"):
+        report_field_verification(entries, auth_token, filepath)
+    return len(unconfirmed)
+
+def load_resume_state(filepath, account_id, resume):
+    """
+    Looks for a restore journal of this backup and account.
+    Returns (fingerprint, outcomes) where outcomes is {(media_type, media_id): ok}
+    if the user resumes (always when resume=True), or None for a fresh restore.
+    """
+    try:
+        fingerprint = file_fingerprint(filepath)
+        outcomes = read_journal(get_journal_path(filepath), fingerprint, account_id)
+    except OSError as e:
+        print_warning(f"Could not read the restore journal: {e}")
+        return None, None
+    if outcomes is None:
+        if resume:
+            print_warning("No restore journal found for this backup and account. Starting a normal import.")
+        return fingerprint, None
+    finished = sum(1 for ok in outcomes.values() if ok)
+    if resume or confirm_boxed(
+        f"Found an unfinished restore of this backup ({finished} entries already restored). Resume where it stopped?"
+    ):
+        return fingerprint, outcomes
+    return fingerprint, None
+
+def open_journal(filepath, fingerprint, account_id, resume):
+    if fingerprint is None:
+        return None
+    try:
+        return RestoreJournal(get_journal_path(filepath), fingerprint, account_id, resume=resume)
+    except OSError as e:
+        print_warning(f"Could not create a restore journal ({e}); this restore can't be resumed after a crash.")
+        return None
 
-def import_workflow():
+def import_workflow(resume=False):
     print_info("Let's restore your AniList from a backup JSON!")
 
     filepath = None
-    while not filepath:
+    loaded = None
+    while not loaded:
         filepath = select_backup_file()
-        if not load_json_backup(filepath):
+        loaded = read_backup(filepath)
+        if not loaded:
             print_error("Invalid or missing file. Please try again.")
-            filepath = None
-
-    backup_data = load_json_backup(filepath)
-    if not validate_backup_json(backup_data):
-        print_error("This backup file is not valid or is from an unsupported format.")
-        return
+    entries, layout, entry_types = loaded
 
     print_info("Select which AniList account to restore to.")
     username, auth_token = choose_account_flow()
@@ -304,41 +370,60 @@ def import_workflow():
             print_error("Operation aborted.")
             return
 
-    entries = get_entries_from_backup(backup_data)
     if not entries:
         print_error("No entries found in backup.")
         return
 
-    entry_types = get_entry_types_in_backup(backup_data)
     entry_type_str = ", ".join(sorted(entry_types))
     print_info(f"Detected entry types in backup: {entry_type_str}")
 
-    print_info(f"Checking your AniList to see if any entries are already present...")
-    to_import, already_present = filter_entries_already_present(entries, auth_token)
+    if confirm_boxed("Restore only part of this backup (filter by score, status, dates, custom lists...)?"):
+        expression = prompt_filter_expression()
+        predicate = compile_filter(expression=expression) if expression else None
+        if predicate is not None:
+            entries = [(mt, e) for mt, e in entries if predicate(e)]
+            print_info(f"Filter matched {len(entries)} entries.")
+            if not entries:
+                print_error("No entries in the backup match this filter.")
+                return
+
+    total_in_backup = len(entries)
+    fingerprint, outcomes = load_resume_state(filepath, viewer_info["id"], resume)
+    if outcomes is not None:
+        entries = [(mt, e) for mt, e in entries if not outcomes.get((mt, e["media"]["id"]))]
+        print_boxed_safe(
+            f"Resuming: {total_in_backup - len(entries)} entries were already restored and are skipped.",
+            "CYAN", 60
+        )
+
+    print_info(f"Comparing your backup with your current AniList...")
+    to_import, already_present, diff_stats, replica = diff_entries_against_current(entries, auth_token)
     print_boxed_safe(
-        f"{len(already_present)} entries are already present on your AniList account and will be skipped.",
+        f"{len(already_present)} entries already match your AniList account and will be skipped.",
         "YELLOW", 60
     )
     print_boxed_safe(
-        f"{len(to_import)} entries will be imported.",
+        f"{len(to_import)} entries will be imported "
+        f"({diff_stats['new']} new, {diff_stats['changed']} updated with changed fields only).",
         "CYAN", 60
     )
+    if diff_stats["duplicate"]:
+        print_info(f"Skipped {diff_stats['duplicate']} duplicate copies of the same entry (one per custom list in older backups).")
 
     if not to_import:
-        print_boxed_safe("All entries from your backup are already present in your AniList account. Nothing to import!", "GREEN", 60)
+        print_boxed_safe("All entries from your backup already match your AniList account. Nothing to import!", "GREEN", 60)
+        if outcomes is not None:
+            try:
+                os.remove(get_journal_path(filepath))
+            except OSError:
+                pass
         return
 
-    # --- Pre-import ETA Calculation ---
+    # --- Pre-import ETA from the live rate-limit budget and measured latency ---
     entries_count = len(to_import)
-    total_eta, avg_entry_time, expected_rate_limits = calculate_dynamic_eta(entries_count)
-    
-    mins, secs = divmod(int(total_eta), 60)
-    hours, mins = divmod(mins, 60)
-    
-    if hours > 0:
-        eta_str = f"{hours:02d}:{mins:02d}:{secs:02d}"
-    else:
-        eta_str = f"{mins:02d}:{secs:02d}"
+    estimator = RestoreEstimator()
+    limit, _ = estimator.transport.limiter.snapshot()
+    eta_str = format_eta(estimator.estimate(entries_count))
 
     print_boxed_safe(
         "AniList has API rate limits, importing might take a while. You can do other stuff in the meantime.",
@@ -346,8 +431,8 @@ def import_workflow():
     )
     print_boxed_safe(
         f"Estimated Time: ~{eta_str} for {entries_count} entries\n"
-        f"Expected rate limits: {expected_rate_limits}\n"
-        f"Average time per entry: {avg_entry_time:.2f}s",
+        f"Requests needed: {estimator.requests_for(entries_count)} (batched)\n"
+        f"Current AniList budget: {limit} requests/min",
         "CYAN", 60
     )
 
@@ -357,106 +442,58 @@ def import_workflow():
         return
 
     # --- Import with progress bar ---
-    restored = 0
-    failed = 0
-    failed_entries = []
     start = time.time()
-    import tqdm
 
-    bar_format = "{desc}: {percentage:3.0f}%|{bar:18}| {n}/{total} [{elapsed}<{remaining}, {rate_fmt}]"
+    # Remaining time comes from the estimator (via postfix), not tqdm's own rate guess
+    bar_format = "{desc}: {percentage:3.0f}%|{bar:18}| {n}/{total} [{elapsed}{postfix}, {rate_fmt}]"
 
+    journal = open_journal(filepath, fingerprint, viewer_info["id"], outcomes is not None)
     try:
-        progress_bar = tqdm.tqdm(
-            to_import,
-            desc="Restoring",
-            unit="entries",
-            dynamic_ncols=True,
-            bar_format=bar_format
+        restored, failed_entries, leftout_entries, interrupted = restore_with_progress(
+            to_import, auth_token, "Restoring", bar_format, replica, journal=journal
         )
-        
-        for idx, (media_type, entry) in enumerate(progress_bar):
-            tick_start = time.time()
-            ok = restore_entry(entry, media_type, auth_token)
-            if ok:
-                restored += 1
-            else:
-                failed += 1
-                failed_entries.append({"media_type": media_type, "entry": entry})
-
-    except KeyboardInterrupt:
-        leftout_entries = to_import[idx+1:] if 'idx' in locals() else to_import
+    finally:
+        if journal:
+            journal.close()
+    failed = len(failed_entries)
+    if interrupted:
         leftout_path = get_leftout_restore_path(filepath)
-        save_leftout_entries(leftout_entries, backup_data, leftout_path)
+        save_leftout_entries(leftout_entries, layout, leftout_path)
         print_boxed_safe("Import interrupted! Unimported entries saved for resume.", "RED", 60)
+        if journal:
+            print_info("Run 'python main.py import --resume' and pick the same backup to continue.")
         return
+    failed_path = get_failed_restore_path(filepath)
+    failed_saved = not failed or save_failed_entries(failed_entries, layout, failed_path)
+    if journal and failed_saved:
+        # Every entry has a known outcome and the failures are safely in the .failed
+        # file, so the journal can go before verification (which may still fail)
+        journal.discard()
 
     elapsed = time.time() - start
     print_boxed_safe(f"Restore complete!", "GREEN", 60)
-    print_boxed_safe(f"Stats:\n  Total in backup: {len(entries)}\n  Already present: {len(already_present)}\n  Imported: {restored}\n  Failed: {failed}\n  Time: {elapsed:.1f} sec", "CYAN", 60)
+    print_boxed_safe(f"Stats:\n  Total in backup: {total_in_backup}\n  Already up to date: {len(already_present)}\n  Imported: {restored}\n  Failed: {failed}\n  Time: {elapsed:.1f} sec", "CYAN", 60)
 
-    # Show verification message ONCE before spinner
-    spinner_progress_bar(task_message="Verifying restored entries in AniList...")
+    report_verification(to_import, auth_token, replica, filepath)
 
-    # After spinner, show verification complete and results
-    verify_result = verify_restored_entries(to_import, auth_token)
-
-    all_verified = True
-    total_failed_verification = 0
-    for mt in sorted(verify_result):
-        present, total = verify_result[mt]
-        print_boxed_safe(f"Verification: {present} / {total} imported entries present in AniList ({mt}).", "CYAN", 60)
-        if present != total:
-            missing = total - present
-            print_boxed_safe(f"{missing} entries are still missing after restore ({mt}).", "RED", 60)
-            total_failed_verification += missing
-            all_verified = False
-
-    print_post_verification_note()
-
-    if all_verified:
-        print_boxed_safe("Verification PASSED: All imported entries are present in your AniList!", "GREEN", 60)
-    else:
-        print_boxed_safe("Verification FAILED: Some imported entries are missing from your AniList.", "RED", 60)
-        print_boxed_safe(f"Total failed verification entries: {total_failed_verification}", "RED", 60)
-
-    failed_path = get_failed_restore_path(filepath)
     if failed:
         print_boxed_safe("Some entries could not be restored.", "RED", 60)
-        save_failed_entries(failed_entries, backup_data, failed_path)
         if confirm_boxed("Retry failed/missing entries?"):
-            failed_data = load_json_backup(failed_path)
-            retry_entries = get_entries_from_backup(failed_data)
+            retry_loaded = read_backup(failed_path)
+            retry_entries, retry_layout, _ = retry_loaded if retry_loaded else ([], layout, set())
             if not retry_entries:
                 print_boxed_safe("No entries in failed backup to retry.", "RED", 60)
             else:
                 print_boxed_safe(f"Retrying {len(retry_entries)} failed entries...", "CYAN", 60)
-                r_restored = 0
-                r_failed = 0
-                r_failed_entries = []
                 r_start = time.time()
-                r_total = len(retry_entries)
-                
-                r_progress_bar = tqdm.tqdm(
-                    retry_entries,
-                    desc="Restoring (Retry)",
-                    unit="entries",
-                    dynamic_ncols=True,
-                    bar_format=bar_format
+
+                r_restored, r_failed_entries, leftout_entries2, r_interrupted = restore_with_progress(
+                    retry_entries, auth_token, "Restoring (Retry)", bar_format, replica
                 )
-                
-                try:
-                    for idx2, (media_type, entry) in enumerate(r_progress_bar):
-                        ok = restore_entry(entry, media_type, auth_token)
-                        if ok:
-                            r_restored += 1
-                        else:
-                            r_failed += 1
-                            r_failed_entries.append({"media_type": media_type, "entry": entry})
-                            
-                except KeyboardInterrupt:
-                    leftout_entries2 = retry_entries[idx2+1:] if 'idx2' in locals() else retry_entries
+                r_failed = len(r_failed_entries)
+                if r_interrupted:
                     leftout_path2 = get_leftout_restore_path(failed_path)
-                    save_leftout_entries(leftout_entries2, failed_data, leftout_path2)
+                    save_leftout_entries(leftout_entries2, retry_layout, leftout_path2)
                     print_boxed_safe("Import interrupted during retry! Unimported entries saved for resume.", "RED", 60)
                     return
 
@@ -464,32 +501,9 @@ def import_workflow():
                 print_boxed_safe("Retry restore complete!", "GREEN", 60)
                 print_boxed_safe(f"Stats:\n  Total retried: {len(retry_entries)}\n  Restored: {r_restored}\n  Failed: {r_failed}\n  Time: {r_elapsed:.1f} sec", "CYAN", 60)
                 
-                # Show verification message ONCE before spinner
-                spinner_progress_bar(task_message="Verifying entries after retry...")
-
-                # After spinner, show verification complete and results
-                all_entries = to_import + retry_entries
-                verify_result = verify_restored_entries(all_entries, auth_token)
-                all_verified = True
-                total_failed_verification = 0
-                for mt in sorted(verify_result):
-                    present, total = verify_result[mt]
-                    print_boxed_safe(f"Verification: {present} / {total} imported entries present in AniList ({mt}).", "CYAN", 60)
-                    if present != total:
-                        missing = total - present
-                        print_boxed_safe(f"{missing} entries are still missing after restore ({mt}).", "RED", 60)
-                        total_failed_verification += missing
-                        all_verified = False
-                
-                print_post_verification_note()
-                
-                if all_verified:
-                    print_boxed_safe("Verification PASSED: All imported entries are present in your AniList!", "GREEN", 60)
-                else:
-                    print_boxed_safe("Verification FAILED: Some imported entries are missing from your AniList.", "RED", 60)
-                    print_boxed_safe(f"Total failed verification entries: {total_failed_verification}", "RED", 60)
-                
+                report_verification(to_import + retry_entries, auth_token, replica, filepath)
+
                 if r_failed:
-                    save_failed_entries(r_failed_entries, failed_data, failed_path)
+                    save_failed_entries(r_failed_entries, retry_layout, failed_path)
     else:
         print_boxed_safe("Your AniList should now match your backup!", "CYAN", 60)
\ No newline at end of file
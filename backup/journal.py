@@ -0,0 +1,105 @@
+"""
+backup/journal.py
+
+Append-only write-ahead journal for restores, kept next to the backup file:
+- The first line identifies the backup (SHA-256 fingerprint) and the target account.
+- Every finished entry appends one line with its media type, media id and outcome,
+  flushed immediately so a crash, kill or network failure loses at most the
+  entries that were still in flight.
+- Resuming replays the journal and skips entries that already succeeded,
+  without contacting AniList. A torn last line from a crash is ignored.
+"""
+
+import os
+from datetime import datetime, timezone
+from anilist.jsoncodec import loads, dumps
+from backup.output import split_backup_ext
+
+JOURNAL_VERSION = 1
+JOURNAL_SYNC_EVERY = 25  # entries between fsyncs; every line is flushed regardless
+
+def get_journal_path(orig_path):
+    dirname, filename = os.path.split(orig_path)
+    base, _ = split_backup_ext(filename)
+    return os.path.join(dirname or ".", f"{base}.journal")
+
+def read_journal(path, fingerprint, account_id):
+    """
+    Replays a journal. Returns {(media_type, media_id): ok} with the latest outcome
+    per entry, or None if there is no journal for this backup and account.
+    """
+    if not os.path.isfile(path):
+        return None
+    outcomes = {}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            header = loads(f.readline())
+        except ValueError:
+            return None
+        if (header.get("aniport_journal") != JOURNAL_VERSION
+                or header.get("fingerprint") != fingerprint
+                or header.get("account") != account_id):
+            return None
+        for line in f:
+            try:
+                record = loads(line)
+                outcomes[(record["type"], record["id"])] = record["ok"]
+            except (ValueError, KeyError):
+                continue  # torn write from an interrupted run
+    return outcomes
+
+def _ends_mid_line(path):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+class RestoreJournal:
+    """
+    Writer side of the journal. With resume=True new records are appended to the
+    existing journal; otherwise a fresh journal (header line) replaces it.
+    """
+
+    def __init__(self, path, fingerprint, account_id, resume=False):
+        self.path = path
+        self.pending = 0
+        torn = resume and _ends_mid_line(path)
+        self.f = open(path, "a" if resume else "w", encoding="utf-8")
+        if torn:
+            # Terminate the torn record so the next one starts on its own line
+            self.f.write("\n")
+        if not resume:
+            header = {
+                "aniport_journal": JOURNAL_VERSION,
+                "fingerprint": fingerprint,
+                "account": account_id,
+                "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self.f.write(dumps(header) + "\n")
+            self._sync()
+
+    def record(self, media_type, entry, ok):
+        self.f.write(dumps({"type": media_type, "id": entry["media"]["id"], "ok": bool(ok)}) + "\n")
+        self.f.flush()
+        self.pending += 1
+        if self.pending >= JOURNAL_SYNC_EVERY:
+            self._sync()
+
+    def _sync(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.pending = 0
+
+    def close(self):
+        if not self.f.closed:
+            self._sync()
+            self.f.close()
+
+    def discard(self):
+        self.f.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
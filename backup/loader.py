@@ -0,0 +1,190 @@
+"""
+backup/loader.py
+
+Single-pass, incremental backup loader:
+- Parses the file once, streaming entries out of {"anime": [...], "manga": [...]},
+  legacy list and NDJSON backups (compressed or not) without building the whole
+  document first.
+- Detects media types and counts entries during that same pass.
+- Delta backups are resolved through their base chain (see backup/delta.py) and
+  then iterated like any other backup.
+"""
+
+import json
+from anilist.jsoncodec import loads
+from backup.output import format_for_path, load_json_backup, open_backup_text
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+MEDIA_KEYS = {"anime": "ANIME", "manga": "MANGA"}
+
+class InvalidBackup(Exception):
+    pass
+
+class _DeltaBackup(Exception):
+    pass
+
+class _JsonStream:
+    """
+    Minimal pull parser over a text file: reads fixed-size chunks and decodes one
+    JSON value at a time with raw_decode, so only the current value is in memory.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.pos > CHUNK_SIZE:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+        self.buf += chunk
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos] if self.pos < len(self.buf) else ""
+            self._fill()
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise InvalidBackup(f"Expected '{ch}' in backup JSON.")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def array(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            ch = self.peek()
+            self.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise InvalidBackup("Malformed array in backup JSON.")
+
+def _list_media_type(entry):
+    mtype = entry.get("media", {}).get("type", None)
+    return mtype if mtype in ("ANIME", "MANGA") else "ANIME"
+
+class BackupReader:
+    """
+    Iterates (media_type, entry) records of a backup in one pass.
+    While iterating it fills in:
+    - layout: "dict" ({"anime": [...], "manga": [...]}) or "list" (legacy/NDJSON)
+    - types: set of media types seen
+    - counts: {"ANIME": n, "MANGA": n}
+    Raises InvalidBackup for files that aren't AniPort backups.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.layout = None
+        self.types = set()
+        self.counts = {}
+
+    def _record(self, media_type, entry):
+        self.types.add(media_type)
+        self.counts[media_type] = self.counts.get(media_type, 0) + 1
+        return media_type, entry
+
+    def __iter__(self):
+        if format_for_path(self.filepath) == "ndjson":
+            yield from self._iter_ndjson()
+            return
+        try:
+            yield from self._iter_json()
+        except _DeltaBackup:
+            yield from self._iter_resolved()
+
+    def _iter_ndjson(self):
+        self.layout = "list"
+        with open_backup_text(self.filepath) as f:
+            for line in f:
+                if line.strip():
+                    entry = loads(line)
+                    yield self._record(_list_media_type(entry), entry)
+
+    def _iter_json(self):
+        with open_backup_text(self.filepath) as f:
+            stream = _JsonStream(f)
+            first = stream.peek()
+            if first == "[":
+                self.layout = "list"
+                for entry in stream.array():
+                    yield self._record(_list_media_type(entry), entry)
+            elif first == "{":
+                yield from self._iter_members(stream)
+            else:
+                raise InvalidBackup("Backup must be a JSON list or object.")
+
+    def _iter_members(self, stream):
+        stream.expect("{")
+        found = False
+        if stream.peek() == "}":
+            stream.pos += 1
+        else:
+            while True:
+                key = stream.value()
+                stream.expect(":")
+                if key == "aniport_delta":
+                    if found:
+                        raise InvalidBackup("Delta metadata must come before entries.")
+                    raise _DeltaBackup()
+                if key in MEDIA_KEYS and stream.peek() == "[":
+                    found = True
+                    self.layout = "dict"
+                    for entry in stream.array():
+                        yield self._record(MEDIA_KEYS[key], entry)
+                else:
+                    stream.value()
+                ch = stream.peek()
+                stream.pos += 1
+                if ch == "}":
+                    break
+                if ch != ",":
+                    raise InvalidBackup("Malformed object in backup JSON.")
+        if not found:
+            raise InvalidBackup("Backup has no 'anime' or 'manga' entries.")
+
+    def _iter_resolved(self):
+        data = load_json_backup(self.filepath)
+        if data is None:
+            raise InvalidBackup("Delta chain could not be resolved.")
+        self.layout = "dict"
+        for key, media_type in MEDIA_KEYS.items():
+            for entry in data.get(key, []):
+                yield self._record(media_type, entry)
+
+def load_backup_entries(filepath):
+    """
+    Reads a backup in one pass.
+    Returns (entries, layout, types, counts) where entries is a list of (media_type, entry).
+    """
+    reader = BackupReader(filepath)
+    entries = list(reader)
+    return entries, reader.layout, reader.types, reader.counts
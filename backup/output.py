@@ -3,45 +3,348 @@ backup/output.py
 
 - Ensures the output/ directory exists for backups.
 - Handles file existence, overwrite confirmation, and basic JSON save/load helpers.
+- Streams backups to disk entry by entry (pretty JSON, compact JSON or NDJSON),
+  writing atomically through a temp file.
+- Resolves delta backups against their base chain on load.
+- Transparent gzip/xz/zstd compression: chosen by extension on save, detected by
+  magic bytes on load, streamed in both directions.
 - Validates backup file structure for import.
 - Adds left out file path helper for interrupted restores.
 """
 
 import os
-import json
+import io
+import gzip
+import lzma
+import zlib
+import tempfile
+from anilist.jsoncodec import loads, dumps, load
 from ui.prompts import confirm_boxed, print_error, print_success
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # .zst backups need `pip install zstandard`
+
 OUTPUT_DIR = "output"
 
 def ensure_output_dir():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
-def get_output_path(username, media_type):
-    # e.g., output/AniXWeebs_anime_backup.json
-    return os.path.join(OUTPUT_DIR, f"{username}_{media_type}_backup.json")
+BACKUP_FORMATS = ("pretty", "compact", "ndjson")
+
+FORMAT_EXTENSIONS = {
+    "pretty": ".json",
+    "compact": ".json",
+    "ndjson": ".ndjson",
+}
+
+COMPRESSION_EXTENSIONS = {
+    "gzip": ".gz",
+    "xz": ".xz",
+    "zstd": ".zst",
+}
+
+MAGIC_BYTES = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+
+BACKUP_EXTENSIONS = tuple(
+    ext + comp
+    for ext in sorted(set(FORMAT_EXTENSIONS.values()))
+    for comp in [""] + list(COMPRESSION_EXTENSIONS.values())
+)
+
+def get_output_path(username, media_type, fmt="pretty", compression=None):
+    # e.g., output/AniXWeebs_anime_backup.json (or .json.gz, .ndjson.zst, ...)
+    ext = FORMAT_EXTENSIONS[fmt] + (COMPRESSION_EXTENSIONS[compression] if compression else "")
+    return os.path.join(OUTPUT_DIR, f"{username}_{media_type}_backup{ext}")
+
+def is_backup_filename(filename):
+    return filename.lower().endswith(BACKUP_EXTENSIONS)
+
+def split_backup_ext(path):
+    """
+    Splits off the full backup extension, e.g. "a.ndjson.gz" -> ("a", ".ndjson.gz").
+    """
+    root, ext = os.path.splitext(path)
+    if ext.lower() in COMPRESSION_EXTENSIONS.values():
+        root, inner = os.path.splitext(root)
+        ext = inner + ext
+    return root, ext
+
+def compression_for_path(filename):
+    _, ext = os.path.splitext(filename.lower())
+    for name, comp_ext in COMPRESSION_EXTENSIONS.items():
+        if ext == comp_ext:
+            return name
+    return None
+
+def available_compressions():
+    return [name for name in COMPRESSION_EXTENSIONS if name != "zstd" or zstandard]
+
+def format_for_path(filename):
+    _, ext = split_backup_ext(filename.lower())
+    return "ndjson" if ext.startswith(".ndjson") else "pretty"
+
+def detect_compression(filepath):
+    with open(filepath, "rb") as f:
+        head = f.read(6)
+    for magic, name in MAGIC_BYTES:
+        if head.startswith(magic):
+            return name
+    return None
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError("zstd backups need the 'zstandard' package (pip install zstandard).")
+
+def open_backup_text(filepath):
+    """
+    Opens a backup for reading as text, decompressing on the fly based on its magic bytes.
+    """
+    compression = detect_compression(filepath)
+    if compression == "gzip":
+        return gzip.open(filepath, "rt", encoding="utf-8")
+    if compression == "xz":
+        return lzma.open(filepath, "rt", encoding="utf-8")
+    if compression == "zstd":
+        _require_zstandard()
+        raw = open(filepath, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True, read_across_frames=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(filepath, "r", encoding="utf-8")
+
+def _new_compressor(compression):
+    if compression == "gzip":
+        return zlib.compressobj(9, zlib.DEFLATED, 31)  # gzip container, gzip.open's default level
+    if compression == "xz":
+        return lzma.LZMACompressor()
+    _require_zstandard()
+    return zstandard.ZstdCompressor().compressobj()
+
+class _PlainSink:
+    def __init__(self, fd):
+        self.f = os.fdopen(fd, "w", encoding="utf-8")
+
+    def write(self, text):
+        self.f.write(text)
+
+    def mark(self):
+        return self.f.tell()
+
+    def rollback(self, pos):
+        self.f.seek(pos)
+        self.f.truncate()
+
+    def close(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+
+    def abort(self):
+        self.f.close()
 
-def save_json_backup(data, filename, overwrite=False):
+class _CompressedSink(_PlainSink):
+    """
+    Compresses text as it is written, so compressed backups never exist on disk
+    uncompressed. Rollback needs no seeking into compressed data: mark() ends the
+    current gzip member / xz stream / zstd frame, so the file can be cut back to
+    that boundary. Readers decompress concatenated members as one stream.
+    """
+
+    def __init__(self, fd, compression):
+        self.f = os.fdopen(fd, "wb")
+        self.compression = compression
+        self.comp = _new_compressor(compression)
+        self.dirty = False
+
+    def write(self, text):
+        self.f.write(self.comp.compress(text.encode("utf-8")))
+        self.dirty = True
+
+    def mark(self):
+        if self.dirty:
+            self.f.write(self.comp.flush())
+            self.comp = _new_compressor(self.compression)
+            self.dirty = False
+        return self.f.tell()
+
+    def rollback(self, pos):
+        super().rollback(pos)
+        self.comp = _new_compressor(self.compression)
+        self.dirty = False
+
+    def close(self):
+        if self.dirty or self.f.tell() == 0:
+            self.f.write(self.comp.flush())
+        super().close()
+
+def confirm_overwrite(filename, overwrite=False):
+    if os.path.isfile(filename) and not overwrite:
+        if not confirm_boxed(f"File '{filename}' already exists. Overwrite?"):
+            print_error(f"Skipped writing {filename}")
+            return False
+    return True
+
+class BackupWriter:
+    """
+    Streams a backup to disk one entry at a time instead of building the whole JSON text.
+    - fmt "pretty": byte-for-byte the same as json.dump(data, indent=2, ensure_ascii=False)
+    - fmt "compact": no indentation or spaces
+    - fmt "ndjson": one entry per line (media.type tells anime and manga apart)
+    layout is "dict" ({"anime": [...], "manga": [...]}) or "list" (legacy single list).
+    Output goes to a temp file in the target directory and is renamed into place on
+    close(), so an interrupted write never leaves a truncated backup behind.
+    If the filename ends in .gz/.xz/.zst, the output is compressed as it is written
+    (see _CompressedSink), so no uncompressed copy ever touches the disk.
+    """
+
+    def __init__(self, filename, fmt="pretty", layout="dict"):
+        if fmt not in BACKUP_FORMATS:
+            raise ValueError(f"Unknown backup format '{fmt}'")
+        self.filename = filename
+        self.compression = compression_for_path(filename)
+        self.fmt = fmt
+        self.layout = layout
+        self.count = 0
+        self.fields = 0
+        fd, self.tmp_path = tempfile.mkstemp(
+            prefix=".", suffix=".tmp", dir=os.path.dirname(filename) or "."
+        )
+        self.f = _CompressedSink(fd, self.compression) if self.compression else _PlainSink(fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _dump(self, value, level):
+        if self.fmt == "pretty":
+            return dumps(value, pretty=True).replace("\n", "\n" + "  " * level)
+        return dumps(value)
+
+    def _begin_member(self, key):
+        if self.fmt == "pretty":
+            self.f.write(("{\n" if not self.fields else ",\n") + "  ")
+            self.f.write(dumps(key) + ": ")
+        else:
+            self.f.write("{" if not self.fields else ",")
+            self.f.write(dumps(key) + ":")
+        self.fields += 1
+
+    def _write_list(self, entries, level):
+        written = 0
+        for entry in entries:
+            if self.fmt == "ndjson":
+                self.f.write(self._dump(entry, 0) + "\n")
+            elif self.fmt == "pretty":
+                self.f.write(("[\n" if not written else ",\n") + "  " * level + self._dump(entry, level))
+            else:
+                self.f.write(("[" if not written else ",") + self._dump(entry, level))
+            written += 1
+            self.count += 1
+        if self.fmt == "pretty":
+            self.f.write("\n" + "  " * (level - 1) + "]" if written else "[]")
+        elif self.fmt == "compact":
+            self.f.write("]" if written else "[]")
+        return written
+
+    def write_section(self, key, entries):
+        """
+        Streams an iterable of entries as data[key]. If the iterable raises, the
+        partial section is rolled back before the exception propagates.
+        Returns the number of entries written.
+        """
+        pos = self.f.mark()
+        fields, count = self.fields, self.count
+        try:
+            if self.fmt != "ndjson":
+                self._begin_member(key)
+            return self._write_list(entries, 2)
+        except Exception:
+            self.f.rollback(pos)
+            self.fields, self.count = fields, count
+            raise
+
+    def write_field(self, key, value):
+        """
+        Writes a non-entry member (e.g. delta metadata) in one piece.
+        """
+        if self.fmt == "ndjson":
+            raise ValueError("NDJSON backups can only hold entries.")
+        self._begin_member(key)
+        self.f.write(self._dump(value, 1))
+
+    def write_entries(self, entries):
+        """
+        Streams entries for the "list" layout. Returns the number written.
+        """
+        return self._write_list(entries, 1)
+
+    def close(self):
+        if self.fmt == "pretty" and self.layout == "dict":
+            self.f.write("\n}" if self.fields else "{}")
+        elif self.fmt == "compact" and self.layout == "dict":
+            self.f.write("}" if self.fields else "{}")
+        self.f.close()
+        os.replace(self.tmp_path, self.filename)
+
+    def abort(self):
+        self.f.abort()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+def save_json_backup(data, filename, overwrite=False, fmt=None):
     try:
-        if os.path.isfile(filename) and not overwrite:
-            if not confirm_boxed(f"File '{filename}' already exists. Overwrite?"):
-                print_error(f"Skipped writing {filename}")
-                return False
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if not confirm_overwrite(filename, overwrite):
+            return False
+        fmt = fmt or format_for_path(filename)
+        layout = "dict" if isinstance(data, dict) else "list"
+        with BackupWriter(filename, fmt=fmt, layout=layout) as writer:
+            if layout == "dict":
+                for key, value in data.items():
+                    if isinstance(value, list):
+                        writer.write_section(key, value)
+                    else:
+                        writer.write_field(key, value)
+            else:
+                writer.write_entries(data)
         print_success(f"Backup saved to {filename}")
         return True
     except Exception as e:
         print_error(f"Failed to save backup: {e}")
         return False
 
+def _read_json(filepath):
+    with open_backup_text(filepath) as f:
+        if format_for_path(filepath) == "ndjson":
+            return [loads(line) for line in f if line.strip()]
+        return load(f)
+
 def load_json_backup(filepath):
+    """
+    Loads a backup. Delta backups are resolved through their base chain, so the
+    result is always a full backup.
+    """
     if not os.path.isfile(filepath):
         print_error(f"File '{filepath}' not found.")
         return None
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _read_json(filepath)
+        from backup.delta import is_delta_backup, resolve_backup_chain
+        if is_delta_backup(data):
+            data = resolve_backup_chain(filepath, data, _read_json)
         return data
     except Exception as e:
         print_error(f"Failed to load JSON backup: {e}")
@@ -58,7 +361,7 @@ def validate_backup_json(data):
 
 def get_leftout_restore_path(orig_path):
     dirname, filename = os.path.split(orig_path)
-    base, ext = os.path.splitext(filename)
+    base, ext = split_backup_ext(filename)
     # Remove all trailing ".leftout"
     while base.endswith(".leftout"):
         base = base[:-len(".leftout")]
@@ -0,0 +1,107 @@
+"""
+backup/restore_engine.py
+
+Concurrent restore pipeline used by the import workflow:
+- Keeps up to `concurrency` aliased SaveMediaListEntry batches in flight at once,
+  so per-request latency overlaps instead of adding up.
+- Every request still goes through the shared transport, so pacing stays with
+  the token-bucket rate limiter.
+- Reports each entry's outcome (with AniList's response) through a callback as
+  soon as its batch returns.
+- Ctrl+C stops the pipeline cleanly: a stop event cancels every batch that is still
+  waiting (rate limiter, circuit breaker, backoff), and the call returns only after
+  the requests already on the wire have finished, so nothing reaches AniList afterwards.
+- RestoreEstimator predicts remaining time from the live rate-limit budget and
+  measured request latency, without any sampling delay.
+"""
+
+import math
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from anilist.api import restore_batch, QueryTooComplex, DEFAULT_RESTORE_BATCH_SIZE
+from anilist.transport import get_transport
+
+DEFAULT_RESTORE_CONCURRENCY = 4
+FALLBACK_LATENCY = 1.0  # seconds, used before any request has been timed
+
+class RestoreEstimator:
+    """
+    Estimates remaining restore time from live data only:
+    - the token bucket's current budget (seeded by the headers of the preceding list fetch)
+    - the transport's EWMA of request latency, which keeps updating during the restore
+    The restore is bounded by whichever is slower: latency with `concurrency`
+    requests in flight, or the rate limit once the current token burst is spent.
+    """
+
+    def __init__(self, batch_size=DEFAULT_RESTORE_BATCH_SIZE, concurrency=DEFAULT_RESTORE_CONCURRENCY, transport=None):
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.transport = transport or get_transport()
+
+    def requests_for(self, entries):
+        return math.ceil(entries / self.batch_size)
+
+    def estimate(self, remaining_entries):
+        requests_left = self.requests_for(remaining_entries)
+        if not requests_left:
+            return 0.0
+        latency = self.transport.latency or FALLBACK_LATENCY
+        latency_bound = requests_left * latency / self.concurrency
+        limit, tokens = self.transport.limiter.snapshot()
+        rate_bound = max(0.0, requests_left - tokens) * 60.0 / limit
+        return max(latency_bound, rate_bound)
+
+async def _restore_all(items, auth_token, on_result, concurrency, batch_size, executor, stop):
+    loop = asyncio.get_running_loop()
+    queue = deque(enumerate(items))
+    state = {"batch_size": batch_size}
+
+    async def worker():
+        while queue:
+            batch = []
+            while queue and len(batch) < state["batch_size"]:
+                batch.append(queue.popleft())
+            entries = [entry for _, (_, entry) in batch]
+            try:
+                results = await loop.run_in_executor(executor, restore_batch, entries, auth_token, None, stop)
+            except QueryTooComplex:
+                if len(batch) == 1:
+                    results = [None]
+                else:
+                    # Shrink for everyone and hand the items back to the front of the queue
+                    state["batch_size"] = max(1, min(state["batch_size"], len(batch) // 2))
+                    queue.extendleft(reversed(batch))
+                    continue
+            for (index, (media_type, entry)), saved in zip(batch, results):
+                on_result(index, media_type, entry, saved)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+def run_concurrent_restore(
+    items,
+    auth_token,
+    on_result,
+    concurrency=DEFAULT_RESTORE_CONCURRENCY,
+    batch_size=DEFAULT_RESTORE_BATCH_SIZE
+):
+    """
+    Restores (media_type, entry) items with bounded concurrency.
+    on_result(index, media_type, entry, saved) is called once per item, in completion
+    order, where index is the item's position in `items` and saved is AniList's
+    response for the entry ({"id", "mediaId", "status"}), or None if it failed.
+    Ctrl+C propagates as KeyboardInterrupt once no more requests can be sent;
+    items whose callback never fired have no known outcome.
+    """
+    if not items:
+        return
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        asyncio.run(_restore_all(items, auth_token, on_result, concurrency, batch_size, executor, stop))
+    finally:
+        stop.set()
+        # Waiting batches raise RequestCancelled right away; only requests already
+        # sent are waited for (bounded by the transport timeout).
+        executor.shutdown(wait=True, cancel_futures=True)
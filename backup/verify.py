@@ -0,0 +1,149 @@
+"""
+backup/verify.py
+
+Restore verification driven by the mutation responses themselves:
+- RestoreReplica is a local copy of the target list, seeded from the list read
+  before the restore and updated from every SaveMediaListEntry response.
+- An entry counts as confirmed once AniList has echoed it back with the
+  expected media id and status, so no waiting or list re-download is needed.
+- Only unconfirmed entries (failed or mismatched responses) are re-checked,
+  with targeted MediaList lookups by media id.
+- Field-level verification compares status, score, progress, dates, notes and
+  privacy, querying only those fields: aliased MediaList lookups for small sets,
+  a list read with the "standard" projection for large ones. Mismatches go to a report file.
+"""
+
+from datetime import datetime, timezone
+from anilist.jsoncodec import dump
+from anilist.api import get_viewer_info, fetch_list_entries, iter_list_pages
+from backup.diff import diff_entry, normalize_field
+
+# Up to this many entries are looked up by media id; beyond that one chunked
+# read of the list (standard projection) needs fewer requests.
+FIELD_LOOKUP_THRESHOLD = 100
+
+class RestoreReplica:
+    """
+    Local replica of the target account's lists: {media_type: {media_id: entry}}.
+    confirmed holds (media_type, media_id) pairs AniList reported as saved.
+    """
+
+    def __init__(self, current_by_type=None):
+        self.lists = {mt: dict(entries) for mt, entries in (current_by_type or {}).items()}
+        self.confirmed = set()
+
+    def apply(self, media_type, entry, saved):
+        """
+        Records one mutation response. saved is what restore_batch returned for
+        the entry ({"id", "mediaId", "status"}), or None if the save failed.
+        """
+        if not saved:
+            return
+        media_id = entry["media"]["id"]
+        current = self.lists.setdefault(media_type, {})
+        merged = dict(current.get(media_id) or {"media": entry["media"]})
+        merged.update(entry)
+        merged["status"] = saved.get("status")
+        current[media_id] = merged
+        if saved.get("mediaId") == media_id and _status_matches(entry, saved):
+            self.confirmed.add((media_type, media_id))
+
+    def is_confirmed(self, media_type, entry):
+        return (media_type, entry["media"]["id"]) in self.confirmed
+
+def _status_matches(entry, saved):
+    # Patch entries without a status field leave it untouched, so anything goes
+    return entry.get("status") is None or entry.get("status") == saved.get("status")
+
+def recheck_entries(entries, auth_token, replica):
+    """
+    Looks up only the given (media_type, entry) pairs on AniList and confirms
+    those that are present with the expected status.
+    """
+    if not entries:
+        return
+    viewer_info = get_viewer_info(auth_token)
+    if not viewer_info:
+        return
+    found = fetch_list_entries(viewer_info["id"], [e["media"]["id"] for _, e in entries], auth_token=auth_token)
+    for media_type, entry in entries:
+        saved = found.get(entry["media"]["id"])
+        if saved:
+            replica.apply(media_type, entry, saved)
+
+def verify_against_replica(entries, replica):
+    """
+    Returns (result, unconfirmed) where result is {media_type: (confirmed, total)}
+    over distinct media ids and unconfirmed lists the (media_type, entry) pairs
+    AniList has not confirmed.
+    """
+    result = {}
+    unconfirmed = []
+    seen = set()
+    for media_type, entry in entries:
+        key = (media_type, entry["media"]["id"])
+        if key in seen:
+            continue
+        seen.add(key)
+        confirmed, total = result.get(media_type, (0, 0))
+        if replica.is_confirmed(media_type, entry):
+            confirmed += 1
+        else:
+            unconfirmed.append((media_type, entry))
+        result[media_type] = (confirmed, total + 1)
+    return result, unconfirmed
+
+def _fetch_current_fields(entries, user_id, auth_token):
+    media_ids = {e["media"]["id"] for _, e in entries}
+    if len(media_ids) <= FIELD_LOOKUP_THRESHOLD:
+        return fetch_list_entries(user_id, media_ids, auth_token=auth_token, profile="standard")
+    current = {}
+    for media_type in sorted({mt for mt, _ in entries}):
+        for page in iter_list_pages(user_id, media_type, auth_token=auth_token, profile="standard"):
+            for e in page:
+                if e["media"]["id"] in media_ids:
+                    current[e["media"]["id"]] = e
+    return current
+
+def verify_fields(entries, auth_token):
+    """
+    Compares every compared field of the given (media_type, entry) pairs with
+    what AniList now holds. Patch entries only have their changed fields checked.
+    Returns (checked, mismatches) where each mismatch is
+    {"media_type", "media_id", "title", "missing", "fields": {field: {"expected", "actual"}}}.
+    """
+    viewer_info = get_viewer_info(auth_token)
+    if not viewer_info:
+        return 0, []
+    unique = {}
+    for media_type, entry in entries:
+        unique[(media_type, entry["media"]["id"])] = (media_type, entry)
+    unique = list(unique.values())
+    current = _fetch_current_fields(unique, viewer_info["id"], auth_token)
+    mismatches = []
+    for media_type, entry in unique:
+        media_id = entry["media"]["id"]
+        title = (entry["media"].get("title") or {}).get("romaji")
+        found = current.get(media_id)
+        if found is None:
+            mismatches.append({"media_type": media_type, "media_id": media_id, "title": title, "missing": True, "fields": {}})
+            continue
+        changes = diff_entry(entry, found)
+        if changes:
+            fields = {
+                field: {"expected": expected, "actual": normalize_field(field, found.get(field))}
+                for field, expected in changes.items()
+            }
+            mismatches.append({"media_type": media_type, "media_id": media_id, "title": title, "missing": False, "fields": fields})
+    return len(unique), mismatches
+
+def write_mismatch_report(path, backup_path, checked, mismatches):
+    report = {
+        "backup": backup_path,
+        "checked_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "checked": checked,
+        "mismatched": len(mismatches),
+        "entries": mismatches,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        dump(report, f, pretty=True)
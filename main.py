@@ -13,20 +13,41 @@ import os
 from ui.banners import print_banner, print_outro, print_random_quote
 from ui.prompts import menu_boxed, print_info, print_success, print_error, prompt_boxed
 from ui.helptext import TOOL_OVERVIEW, MAIN_MENU_HELP
-from ui.motd import show_motd_if_needed   # <-- ADDED
+from ui.motd import show_motd_if_needed, start_remote_motd_check   # <-- ADDED
 
-# ===== Import Workflow Modules =====
-from backup.exporter import export_workflow
-from backup.importer import import_workflow
+# Workflow modules (and with them requests/tqdm) are imported on menu selection,
+# so the first prompt doesn't wait for them.
 
-# ===== Ensure output dir exists =====
-from backup.output import ensure_output_dir
+USAGE = "Usage: python main.py [import [--resume] | batch CONFIG.json]"
 
-def main():
-    ensure_output_dir()
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    valid = (
+        not args
+        or (args[0] == "import" and all(a == "--resume" for a in args[1:]))
+        or (args[0] == "batch" and len(args) == 2)
+    )
+    if not valid:
+        print_error(f"Unknown arguments: {' '.join(args)}\n{USAGE}")
+        sys.exit(2)
+
+    if args and args[0] == "batch":  # non-interactive, so no banner/MOTD
+        from backup.batch import batch_workflow
+        sys.exit(0 if batch_workflow(args[1]) else 1)
+
+    start_remote_motd_check()  # background; result is used from the cache
     print_banner()
     show_motd_if_needed()    # <-- ADDED
     print_info("Welcome to your AniList Backup & Restore Tool!\n")
+
+    if args:  # import [--resume]: straight to the restore, resuming from its journal if asked
+        from backup.output import ensure_output_dir
+        from backup.importer import import_workflow
+        ensure_output_dir()
+        import_workflow(resume="--resume" in args)
+        print_outro()
+        return
+
     print_random_quote()
 
     while True:
@@ -36,6 +57,7 @@ def main():
             [
                 "Export your AniList (create a backup)",
                 "Import from a backup (restore your list)",
+                "Compact a delta backup chain into a full backup",
                 "Learn more about this tool",
                 "Exit"
             ],
@@ -45,21 +67,32 @@ def main():
         if choice == 1:  # Export
             # Export workflow (with pre-confirmation)
             print_info("You have chosen to EXPORT (backup) your AniList!")
+            from backup.exporter import export_workflow
             export_workflow()
             print_outro()
             break
 
         elif choice == 2:  # Import/Restore
             print_info("You have chosen to IMPORT (restore) a backup!")
+            from backup.output import ensure_output_dir
+            from backup.importer import import_workflow
+            ensure_output_dir()
             import_workflow()
             print_outro()
             break
 
-        elif choice == 3:  # Learn more
+        elif choice == 3:  # Compact delta chain
+            print_info("You have chosen to COMPACT a delta backup chain!")
+            from backup.delta import compact_workflow
+            compact_workflow()
+            print_outro()
+            break
+
+        elif choice == 4:  # Learn more
             print_info(TOOL_OVERVIEW)
             input("\nPress Enter to return to the main menu...")
 
-        elif choice == 4:  # Exit
+        elif choice == 5:  # Exit
             print_success("Thanks for using AniList Backup Tool! See you next time, senpai!")
             print_outro()
             sys.exit(0)
@@ -23,8 +23,9 @@ MAIN_MENU_HELP = (
     "Choose what you'd like to do:\n"
     "1: Export - Backup your AniList lists as JSON files (anime and/or manga).\n"
     "2: Import - Restore a backup JSON to any AniList account (with authentication and verification).\n"
-    "3: Learn more - Get a detailed overview about features, flows, and UI tips.\n"
-    "4: Exit - Leave the tool.\n"
+    "3: Compact - Fold a delta backup and its base chain back into one full backup.\n"
+    "4: Learn more - Get a detailed overview about features, flows, and UI tips.\n"
+    "5: Exit - Leave the tool.\n"
     "Type -help at any prompt for context-sensitive help."
 )
 
@@ -62,6 +63,27 @@ EXPORT_TYPE_HELP = (
     "Both: Export both lists together."
 )
 
+EXPORT_MODE_HELP = (
+    "Full backup: Save your whole list as a standalone backup file.\n"
+    "Delta backup: Pick a previous backup as the base and save only what was added, changed or removed since then.\n"
+    "Delta files are small and can be restored directly, as long as their base files stay next to them.\n"
+    "Use 'Compact a delta backup chain' from the main menu to turn a chain back into one full backup."
+)
+
+EXPORT_FORMAT_HELP = (
+    "Pretty JSON: Indented and easy to read (same layout as older AniPort backups).\n"
+    "Compact JSON: Same data without indentation, noticeably smaller.\n"
+    "NDJSON: One entry per line, handy for scripts and very large lists.\n"
+    "All formats can be restored by AniPort."
+)
+
+EXPORT_COMPRESSION_HELP = (
+    "Compressed backups are much smaller and are restored by AniPort just like plain ones.\n"
+    "gzip: Fast and works everywhere.\n"
+    "xz: Smallest files, slower to write.\n"
+    "zstd: Fast and small (only listed when the 'zstandard' package is installed)."
+)
+
 EXPORT_STATUS_HELP = (
     "Export only entries with specific statuses (e.g. Completed, Watching).\n"
     "Type status code or number (separated by spaces or commas):\n"
@@ -72,6 +94,15 @@ EXPORT_TITLE_HELP = (
     "Export only entries whose title contains a specific substring (case-insensitive)."
 )
 
+FILTER_EXPRESSION_HELP = (
+    "Terms are separated by spaces and every term must match. Quote values with spaces.\n"
+    "status=COMPLETED,PAUSED   score>=7   score<=9   progress>=12   volumes>=3\n"
+    "started>=2020   completed<=2023-06-30   (dates: YYYY, YYYY-MM or YYYY-MM-DD)\n"
+    "title~\"^one piece\" (regex, case-insensitive)   title=\"Frieren\" (plain text)\n"
+    "private=yes|no   list=Favourites,Rewatch (member of any listed custom list)\n"
+    "Leave empty for no advanced filter."
+)
+
 IMPORT_FILE_HELP = (
     "Enter the path to a backup JSON file created by this tool (e.g., output/MyAnimeName_anime_backup.json).\n"
     "You may select from detected files, or enter a custom path if needed."
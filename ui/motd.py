@@ -1,16 +1,32 @@
+"""
+ui/motd.py
+
+Admin message of the day and update notice:
+- The local motd.txt is shown once per change.
+- The remote motd.txt (on GitHub) is checked in a background thread and cached
+  in the state file, so startup never waits on the network. A cached result
+  younger than REMOTE_MOTD_FRESHNESS is reused without fetching again.
+- The cache remembers which local motd.txt it was fetched against; once the local
+  file changes (e.g. after `git pull`) the cached copy is treated as stale and
+  refreshed instead of being trusted.
+- If the cached remote message differs from the local one, the update notice is shown.
+"""
+
 import os
 import hashlib
-import json
 import sys
+import time
+import tempfile
+import threading
 from ui.colors import print_boxed_safe
-
-try:
-    import requests
-except ImportError:
-    requests = None  # We'll show a warning if requests is not installed
+from anilist.jsoncodec import load, dump
 
 REMOTE_MOTD_URL = "https://raw.githubusercontent.com/itzraiyan/AniPort/main/motd.txt"
 MOTD_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "motd.txt")
+REMOTE_MOTD_FRESHNESS = 6 * 3600  # seconds
+REMOTE_MOTD_TIMEOUT = 5  # seconds, only ever waited on by the background thread
+
+_state_lock = threading.Lock()
 
 def get_state_file_path():
     # Save in ~/AniPort/.aniport_seen_motd.json (not in root)
@@ -35,39 +51,85 @@ def get_motd_message():
 def get_motd_hash(msg):
     return hashlib.sha256(msg.encode("utf-8")).hexdigest()
 
-def has_seen_motd(msg_hash):
+def _read_state():
     state_file = get_state_file_path()
     if not os.path.isfile(state_file):
-        return False
+        return {}
     try:
         with open(state_file, "r") as f:
-            state = json.load(f)
-        return state.get("motd_hash") == msg_hash
+            state = load(f)
+        return state if isinstance(state, dict) else {}
     except Exception:
-        return False
+        return {}
+
+def _update_state(**changes):
+    # Seen-hash and remote cache share one file; merge instead of overwriting, and
+    # replace atomically since the background check may write while startup reads
+    with _state_lock:
+        state = _read_state()
+        state.update(changes)
+        state_file = get_state_file_path()
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=os.path.dirname(state_file))
+            with os.fdopen(fd, "w") as f:
+                dump(state, f)
+            os.replace(tmp_path, state_file)
+        except Exception:
+            pass
+
+def has_seen_motd(msg_hash):
+    return _read_state().get("motd_hash") == msg_hash
 
 def record_seen_motd(msg_hash):
-    state_file = get_state_file_path()
-    try:
-        with open(state_file, "w") as f:
-            json.dump({"motd_hash": msg_hash}, f)
-    except Exception:
-        pass
+    _update_state(motd_hash=msg_hash)
 
 def fetch_remote_motd():
-    if not requests:
+    try:
+        import requests
+    except ImportError:
         return None  # Can't fetch without requests
     try:
-        resp = requests.get(REMOTE_MOTD_URL, timeout=5)
+        resp = requests.get(REMOTE_MOTD_URL, timeout=REMOTE_MOTD_TIMEOUT)
         if resp.status_code == 200:
             return resp.text
     except Exception:
         pass
     return None
 
+def _local_motd_hash():
+    return get_motd_hash((get_motd_message() or "").strip())
+
+def get_cached_remote_motd():
+    """
+    Returns (text, fetched_at) from the last successful background check, or (None, 0)
+    if there is none or it was fetched against a different local motd.txt.
+    """
+    cached = _read_state().get("remote_motd") or {}
+    if cached.get("local_hash") != _local_motd_hash():
+        return None, 0
+    return cached.get("text"), cached.get("fetched_at", 0)
+
+def _refresh_remote_motd():
+    local_hash = _local_motd_hash()
+    text = fetch_remote_motd()
+    if text is not None:
+        _update_state(remote_motd={"text": text, "fetched_at": time.time(), "local_hash": local_hash})
+
+def start_remote_motd_check():
+    """
+    Refreshes the cached remote MOTD in a daemon thread unless the cache is still fresh.
+    Returns the thread, or None when no check was needed.
+    """
+    _, fetched_at = get_cached_remote_motd()
+    if time.time() - fetched_at < REMOTE_MOTD_FRESHNESS:
+        return None
+    thread = threading.Thread(target=_refresh_remote_motd, name="aniport-motd", daemon=True)
+    thread.start()
+    return thread
+
 def show_motd_if_needed():
-    # 1. Try to fetch remote MOTD
-    remote_msg = fetch_remote_motd()
+    # 1. Compare against the remote MOTD cached by the last background check
+    remote_msg, _ = get_cached_remote_motd()
     local_msg = get_motd_message()
 
     if remote_msg and (remote_msg.strip() != (local_msg or "").strip()):
@@ -46,6 +46,30 @@ def print_progress_bar(iterable, desc):
         # Fallback: just return the iterable, no progress bar
         return iterable
 
+class PageProgress:
+    """
+    Progress for paged fetches: one tick per page, running entry count alongside.
+    Call it as on_page(page_number, entries_in_page); close() when done.
+    """
+
+    def __init__(self, desc):
+        self.entries = 0
+        try:
+            from tqdm import tqdm
+            self.bar = tqdm(desc=desc, unit="page")
+        except ImportError:
+            self.bar = None
+
+    def __call__(self, page_number, count):
+        self.entries += count
+        if self.bar is not None:
+            self.bar.set_postfix(entries=self.entries, refresh=False)
+            self.bar.update(1)
+
+    def close(self):
+        if self.bar is not None:
+            self.bar.close()
+
 # For quick info/error/success, re-export from colors
 print_info = print_info
 print_error = print_error